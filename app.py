@@ -1,22 +1,29 @@
 import fitz
+import gzip
+import hashlib
 import logging
+import numpy as np
 import requests
-import time
 import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import chain, repeat
 from flask import Flask, request, jsonify, send_file, Response, stream_with_context
+from requests.adapters import HTTPAdapter
 from modules.find_references import extract_references
 from modules.verify_references import (
+    fetch_paper_abstract,
     find_best_match,
     get_fallback_reference_verification,
-    smart_extract_search_query,
-    search_openalex,
+    search_reference,
 )
 from modules.find_github_urls import extract_github_urls
 from modules.find_candidate_papers import (
     extract_paper_keywords,
     search_candidate_papers_openalex,
+    shortlist_candidates,
     rank_papers_by_similarity,
 )
 from modules.find_title_and_authors import extract_title_authors_with_ai
@@ -24,9 +31,13 @@ from modules.analyze_authors import (
     get_author_from_google_scholar,
     get_author_from_openalex,
     get_author_from_openalex_by_paper,
+    prefetch_paper_authors,
     generate_team_analysis,
     get_fallback_author_analysis,
+    create_fallback_author,
 )
+from modules.rate_limiter import RateLimiter
+from modules.sqlite_cache import SQLiteCache
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -39,10 +50,57 @@ from flask_cors import CORS
 
 CORS(app)
 
+# 共享 HTTP 连接池：复用到 DeepSeek / OpenAlex 的 TCP+TLS 连接
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=64))
+_SESSION.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=64))
+
+# 以 PDF 哈希为键缓存解析结果，重复上传同一文件时直接返回
+_UPLOAD_CACHE = SQLiteCache("upload_cache")
+
+
+def normalize_text_key(text):
+    """
+    生成文本的缓存键：统一大小写并合并空白
+    """
+    return re.sub(r"\s+", " ", text.lower()).strip()[:512]
+
+
+# 超过该大小（字节）的 JSON 响应才进行 gzip 压缩
+COMPRESS_MIN_SIZE = 2048
+
+
+@app.after_request
+def compress_json_response(response):
+    """
+    对支持 gzip 的客户端压缩较大的 JSON 响应（如包含论文全文的上传结果）
+    """
+    if (
+        response.mimetype != "application/json"
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or "gzip" not in request.headers.get("Accept-Encoding", "").lower()
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+# 首页缓存时间（秒），过期后浏览器通过 ETag 协商，未修改时返回 304
+INDEX_MAX_AGE = 300
+
 
 @app.route("/")
 def index():
-    return send_file("index.html")
+    return send_file("index.html", conditional=True, max_age=INDEX_MAX_AGE)
 
 
 @app.route("/api/upload", methods=["POST"])
@@ -55,40 +113,60 @@ def upload_pdf():
         return jsonify({"error": "文件名为空"}), 400
 
     try:
-        file_content = file.read()
-        doc = fitz.open(stream=file_content, filetype="pdf")
+        # 先分块计算哈希，命中缓存时无需把整个文件读入内存
+        file.stream.seek(0)
+        pdf_hash = calculate_stream_hash(file.stream)
+
+        cached_result = _UPLOAD_CACHE.get(pdf_hash)
+        if cached_result is not None:
+            logger.info(f"命中上传缓存: {pdf_hash}")
+            return jsonify(cached_result)
 
-        text = ""
-        for page in doc:
-            page_text = page.get_text()
-            text += page_text + "\n"
+        file.stream.seek(0)
+        doc = fitz.open(stream=file.stream.read(), filetype="pdf")
+
+        # 逐页提取后一次性拼接，避免大文件上的重复字符串拷贝；
+        # 提取选项与拼接结果都与逐页 += 拼接逐字节一致，笔记文件名依赖文本的 MD5
+        text = "".join(page.get_text() + "\n" for page in doc)
 
         logger.info(f"提取到文本长度: {len(text)} 字符")
 
         page_count = len(doc)
 
-        lines = text.split("\n")
-        first_50_lines = "\n".join(lines[:50])
+        # 只切分前 50 行，不必拆分全文
+        first_50_lines = "\n".join(text.split("\n", 50)[:50])
 
         api_key = request.headers.get("X-API-Key")
-        title, authors = extract_title_authors_with_ai(first_50_lines, api_key)
 
-        references = extract_references(text)
+        # 标题作者（网络请求）与引用、GitHub 链接提取互不依赖，并行执行
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            title_future = executor.submit(
+                extract_title_authors_with_ai, first_50_lines, api_key
+            )
+            references_future = executor.submit(extract_references, text)
+            github_future = executor.submit(extract_github_urls, text)
+
+            title, authors = title_future.result()
+            references = references_future.result()
+            github_urls = github_future.result()
 
-        # 提取 GitHub 链接
-        github_urls = extract_github_urls(text)
         logger.info(f"提取到 GitHub 链接: {github_urls}")
 
-        return jsonify(
-            {
-                "text": text if text else "",
-                "page_count": page_count if page_count else 0,
-                "references": references if references else [],
-                "title": title,
-                "authors": authors,
-                "github_urls": github_urls,
-            }
-        )
+        result = {
+            "text": text if text else "",
+            "page_count": page_count if page_count else 0,
+            "references": references if references else [],
+            "title": title,
+            "authors": authors,
+            "github_urls": github_urls,
+            "pdf_hash": pdf_hash,
+        }
+
+        # 没有 API Key 或 AI 提取失败时标题作者不可靠，不写入缓存
+        if api_key and title:
+            _UPLOAD_CACHE.set(pdf_hash, result)
+
+        return jsonify(result)
 
     except Exception as e:
         logger.error(f"PDF处理错误: {str(e)}")
@@ -97,18 +175,40 @@ def upload_pdf():
         if "doc" in locals():
             doc.close()
 
+
+def open_chat_completion_stream(api_key, api_base, model, messages, **options):
+    """
+    向上游发起流式对话请求，返回未读取的流式响应
+    """
+    return _SESSION.post(
+        f"{api_base}/chat/completions",
+        headers={
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {api_key}',
+            'Accept-Encoding': 'identity'  # 避免上游压缩导致分块被缓冲
+        },
+        json={
+            'model': model,
+            'messages': messages,
+            'stream': True,
+            **options
+        },
+        stream=True,
+        timeout=60
+    )
+
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
+    """
+    对话接口：?stream=1 时返回 SSE 流，否则在服务端聚合流式结果后返回 JSON
+    """
+    if request.args.get('stream') == '1':
+        return chat_stream()
+
     data = request.json
     messages = data.get('messages', [])
     api_key = request.headers.get('X-API-Key')
-    print(f"=== DEBUG: API Key 值 ===")
-    print(f"API Key 是否存在: {'X-API-Key' in request.headers}")
-    print(f"API Key 值: '{api_key}'")
-    print(f"API Key 长度: {len(api_key) if api_key else 0}")
-    print(f"API Key 是否为空: {not api_key}")
-    print(f"API Key 是否为None: {api_key is None}")
-    print(f"=== DEBUG 结束 ===")
     model = data.get('model', 'deepseek-chat')
     api_base = data.get('api_base', 'https://api.deepseek.com/v1')
 
@@ -116,25 +216,59 @@ def chat():
         return jsonify({"error": "未提供 API Key"}), 401
 
     try:
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        
-        payload = {
-            "model": model,
-            "messages": messages,
-            "max_tokens": 3000,
-            "temperature": 0.2,
-            "stream": False
-        }
-
-        response = requests.post(f"{api_base}/chat/completions", headers=headers, json=payload)
-        
-        if response.status_code != 200:
-            return jsonify({"error": f"DeepSeek API Error: {response.text}"}), response.status_code
+        # 上游同样使用流式输出，逐块聚合，读取完毕即释放连接；
+        # include_usage 让最后一块带上 token 用量，与非流式响应保持一致
+        with open_chat_completion_stream(
+            api_key, api_base, model, messages,
+            temperature=0.2,
+            stream_options={'include_usage': True}
+        ) as response:
+            if response.status_code != 200:
+                return jsonify({"error": f"DeepSeek API Error: {response.text}"}), response.status_code
 
-        return jsonify(response.json())
+            parts = []
+            completion = {}
+            finish_reason = None
+            usage = None
+            for line in response.iter_lines():
+                if not line.startswith(b'data: '):
+                    continue
+                chunk = line[6:].strip()
+                if chunk == b'[DONE]':
+                    break
+                # 跳过保活或格式异常的数据行，不因单个分块丢弃整段回复
+                try:
+                    event = json.loads(chunk)
+                except ValueError:
+                    continue
+                if not isinstance(event, dict):
+                    continue
+                if not completion:
+                    completion = event
+                if event.get('usage'):
+                    usage = event['usage']
+                choices = event.get('choices') or [{}]
+                if choices[0].get('finish_reason'):
+                    finish_reason = choices[0]['finish_reason']
+                content = choices[0].get('delta', {}).get('content')
+                if content:
+                    parts.append(content)
+
+        # 保持与非流式接口一致的响应结构
+        return jsonify({
+            "id": completion.get('id'),
+            "object": "chat.completion",
+            "created": completion.get('created'),
+            "model": completion.get('model', model),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(parts)},
+                    "finish_reason": finish_reason or "stop"
+                }
+            ],
+            "usage": usage
+        })
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -152,32 +286,24 @@ def chat_stream():
     
     def generate():
         try:
-            response = requests.post(
-                f"{api_base}/chat/completions",
-                headers={
-                    'Content-Type': 'application/json',
-                    'Authorization': f'Bearer {api_key}'
-                },
-                json={
-                    'model': data.get('model', 'deepseek-chat'),
-                    'messages': data.get('messages', []),
-                    'stream': True
-                },
-                stream=True,
-                timeout=60
+            response = open_chat_completion_stream(
+                api_key,
+                api_base,
+                data.get('model', 'deepseek-chat'),
+                data.get('messages', [])
             )
             
             if response.status_code != 200:
-                yield f"data: {json.dumps({'error': f'API错误: {response.status_code}'})}\n\n"
+                yield f"event: error\ndata: {json.dumps({'error': f'API错误: {response.status_code}'})}\n\n"
                 return
             
-            for line in response.iter_lines():
-                if line:
-                    decoded_line = line.decode('utf-8')
-                    yield f"{decoded_line}\n\n"
+            # 上游已是 SSE 格式，原样转发字节块，无需逐行解码再拼接
+            for chunk in response.iter_content(chunk_size=4096):
+                if chunk:
+                    yield chunk
                     
         except Exception as e:
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
     
     return Response(
         stream_with_context(generate()),
@@ -234,10 +360,13 @@ def recommend_papers():
                 }
             )
 
-        # 3. 使用语义相似度排序
-        ranked_papers = rank_papers_by_similarity(
+        # 3. 按标题初筛并补全摘要，再使用语义相似度排序
+        shortlisted_papers = shortlist_candidates(
             query_text, candidate_papers, top_k=max_results
         )
+        ranked_papers = rank_papers_by_similarity(
+            query_text, shortlisted_papers, top_k=max_results
+        )
 
         logger.info(f"排序后论文数量: {len(ranked_papers)}")  # 调试日志
 
@@ -280,10 +409,7 @@ def recommend_papers():
         return jsonify(response_data)
 
     except Exception as e:
-        logger.error(f"论文推荐错误: {str(e)}")
-        import traceback
-
-        traceback.print_exc()
+        logger.exception(f"论文推荐错误: {str(e)}")
 
         return (
             jsonify(
@@ -299,6 +425,35 @@ def recommend_papers():
         )
 
 
+# 作者查询并发数与 Google Scholar 请求速率（次/秒）；OpenAlex 的限速在 analyze_authors 模块内按请求进行
+AUTHOR_LOOKUP_WORKERS = 4
+_SCHOLAR_LIMITER = RateLimiter(rate=2)
+
+
+def fetch_author_details(author_name, paper_title):
+    """
+    获取单个作者详情：优先使用论文标题联合搜索 OpenAlex，失败时再查 Google Scholar
+    """
+    logger.info(f"获取作者详情: {author_name}")
+
+    try:
+        # 优先使用 OpenAlex（API 请求快且可批量预取）
+        author_details = get_author_from_openalex_by_paper(author_name, paper_title)
+
+        # 如果 OpenAlex 失败，再使用较慢的 Google Scholar
+        if not author_details.get("searchSuccess"):
+            logger.info(f"OpenAlex 未找到，尝试 Google Scholar: {author_name}")
+            _SCHOLAR_LIMITER.acquire()
+            author_details = get_author_from_google_scholar(author_name)
+
+        return author_details
+
+    except Exception as e:
+        # 单个作者失败不影响整批结果
+        logger.error(f"获取作者详情失败 {author_name}: {str(e)}")
+        return create_fallback_author(author_name, str(e))
+
+
 # 修改 analyze_authors 接口
 @app.route("/api/analyze_authors", methods=["POST"])
 def analyze_authors():
@@ -315,21 +470,15 @@ def analyze_authors():
     logger.info(f"开始分析作者信息: {authors}")
     logger.info(f"论文标题: {paper_title[:50]}..." if paper_title else "无论文标题")
 
-    detailed_authors = []
-
-    for i, author_name in enumerate(authors):
-        logger.info(f"获取作者详情 {i+1}/{len(authors)}: {author_name}")
-
-        # 优先使用 Google Scholar
-        author_details = get_author_from_google_scholar(author_name)
-
-        # 如果 Google Scholar 失败，使用论文标题联合搜索 OpenAlex
-        if not author_details.get("searchSuccess"):
-            logger.info(f"Google Scholar 未找到，尝试论文联合搜索: {author_name}")
-            author_details = get_author_from_openalex_by_paper(author_name, paper_title)
+    # 先按论文批量预取 OpenAlex 作者详情，逐个查询时直接命中缓存
+    if paper_title:
+        prefetch_paper_authors(authors, paper_title)
 
-        detailed_authors.append(author_details)
-        time.sleep(1)  # 避免请求过快
+    # 并发查询各作者，map 保持输入顺序
+    with ThreadPoolExecutor(max_workers=AUTHOR_LOOKUP_WORKERS) as executor:
+        detailed_authors = list(
+            executor.map(fetch_author_details, authors, repeat(paper_title))
+        )
 
     return jsonify(
         {
@@ -341,6 +490,23 @@ def analyze_authors():
     )
 
 
+def fetch_updated_author_details(author_name):
+    """
+    获取手动更新后的单个作者详情：优先按姓名搜索 OpenAlex，失败时再查 Google Scholar
+    """
+    logger.info(f"获取更新作者详情: {author_name}")
+
+    author_details = get_author_from_openalex(author_name)
+
+    # 如果 OpenAlex 失败，尝试 Google Scholar
+    if not author_details or not author_details.get("searchSuccess"):
+        logger.info(f"OpenAlex 未找到，尝试 Google Scholar: {author_name}")
+        _SCHOLAR_LIMITER.acquire()
+        author_details = get_author_from_google_scholar(author_name)
+
+    return author_details
+
+
 @app.route("/api/update_authors", methods=["POST"])
 def update_authors():
     """
@@ -354,19 +520,10 @@ def update_authors():
         return jsonify({"error": "作者数据不能为空"}), 400
 
     try:
-        # 为更新后的作者获取详细信息
-        detailed_authors = []
-        for i, author in enumerate(updated_authors):
-            logger.info(f"获取更新作者详情 {i+1}/{len(updated_authors)}: {author}")
-            author_details = get_author_from_google_scholar(author)
-
-            # 如果 Google Scholar 失败，尝试 OpenAlex
-            if not author_details.get("searchSuccess"):
-                logger.info(f"Google Scholar 未找到，尝试 OpenAlex: {author}")
-            author_details = get_author_from_openalex(author)
-            if author_details:
-                detailed_authors.append(author_details)
-            time.sleep(0.5)
+        # 为更新后的作者并发获取详细信息，由限速器代替固定的 sleep
+        with ThreadPoolExecutor(max_workers=AUTHOR_LOOKUP_WORKERS) as executor:
+            results = executor.map(fetch_updated_author_details, updated_authors)
+            detailed_authors = [author for author in results if author]
 
         return jsonify(
             {
@@ -392,6 +549,10 @@ def update_authors():
         )
 
 
+# OpenAlex 引用结果缓存 24 小时
+_CITATIONS_CACHE = SQLiteCache("citations_cache", ttl=24 * 3600)
+
+
 @app.route("/api/get_citations", methods=["POST"])
 def get_citations():
     """
@@ -405,6 +566,16 @@ def get_citations():
 
     logger.info(f"搜索引用论文，标题: {paper_title}")
 
+    # 同一标题 24 小时内直接返回缓存，?nocache=1 时强制重新查询
+    cache_key = hashlib.blake2b(
+        normalize_text_key(paper_title).encode("utf-8"), digest_size=16
+    ).hexdigest()
+    if request.args.get("nocache") != "1":
+        cached_result = _CITATIONS_CACHE.get(cache_key)
+        if cached_result is not None:
+            logger.info(f"命中引用论文缓存: {paper_title[:50]}")
+            return jsonify(cached_result)
+
     try:
         headers = {"User-Agent": "PaperLens/1.0 (mailto:contact@example.com)"}
 
@@ -412,7 +583,7 @@ def get_citations():
         search_url = "https://api.openalex.org/works"
         search_params = {"search": paper_title, "per_page": 1}
 
-        search_response = requests.get(
+        search_response = _SESSION.get(
             search_url, params=search_params, headers=headers, timeout=15
         )
 
@@ -443,7 +614,7 @@ def get_citations():
             "sort": "cited_by_count:desc",
         }
 
-        citations_response = requests.get(
+        citations_response = _SESSION.get(
             citations_url, params=citations_params, headers=headers, timeout=15
         )
 
@@ -463,19 +634,14 @@ def get_citations():
                 if author.get("display_name"):
                     authors.append({"name": author["display_name"]})
 
-            # 提取摘要
+            # 提取摘要（OpenAlex 的摘要是倒排索引格式，需要还原）
             abstract = ""
             if work.get("abstract_inverted_index"):
-                # OpenAlex 的摘要是倒排索引格式，需要还原
                 try:
-                    inverted = work["abstract_inverted_index"]
-                    word_positions = []
-                    for word, positions in inverted.items():
-                        for pos in positions:
-                            word_positions.append((pos, word))
-                    word_positions.sort()
-                    abstract = " ".join([w for _, w in word_positions])[:300] + "..."
-                except:
+                    abstract = _decode_inverted(work["abstract_inverted_index"])
+                    if abstract:
+                        abstract = abstract[:300] + "..."
+                except Exception:
                     abstract = ""
 
             # 提取期刊/会议名称
@@ -505,20 +671,21 @@ def get_citations():
                 }
             )
 
-        return jsonify(
-            {
-                "success": True,
-                "source": "OpenAlex",
-                "original_paper": {
-                    "title": paper.get("title", paper_title),
-                    "citationCount": paper.get("cited_by_count", 0),
-                    "year": paper.get("publication_year"),
-                    "doi": paper.get("doi", ""),
-                },
-                "citations_count": len(formatted_citations),
-                "citations": formatted_citations,
-            }
-        )
+        result = {
+            "success": True,
+            "source": "OpenAlex",
+            "original_paper": {
+                "title": paper.get("title", paper_title),
+                "citationCount": paper.get("cited_by_count", 0),
+                "year": paper.get("publication_year"),
+                "doi": paper.get("doi", ""),
+            },
+            "citations_count": len(formatted_citations),
+            "citations": formatted_citations,
+        }
+
+        _CITATIONS_CACHE.set(cache_key, result)
+        return jsonify(result)
 
     except Exception as e:
         logger.error(f"OpenAlex API 错误: {e}")
@@ -528,45 +695,68 @@ def get_citations():
                 "error": str(e),
                 "fallback_used": True,
                 "original_paper": {"title": paper_title, "citationCount": 0},
-                "citations_count": len(get_fallback_citations()),
-                "citations": get_fallback_citations(),
+                "citations_count": len(_FALLBACK_CITATIONS),
+                "citations": _FALLBACK_CITATIONS,
             }
         )
 
 
-def get_fallback_citations():
+# 倒排索引中不同单词数超过该值时跳过还原，避免极端情况下的延迟
+MAX_INVERTED_WORDS = 2000
+
+
+def _decode_inverted(inverted):
     """
-    返回示例引用数据
+    将 OpenAlex 倒排索引还原为文本：展平为位置数组后一次排序
     """
-    return [
-        {
-            "title": "深度学习在自然语言处理中的最新进展",
-            "authors": [{"name": "张伟"}, {"name": "李静"}],
-            "year": 2023,
-            "venue": "人工智能学报",
-            "citationCount": 45,
-            "abstract": "本文综述了深度学习在自然语言处理领域的最新研究成果和应用前景...",
-            "url": "https://example.com/paper1",
-        },
-        {
-            "title": "基于Transformer的文本表示学习研究",
-            "authors": [{"name": "王明"}, {"name": "赵雪"}],
-            "year": 2022,
-            "venue": "计算机研究",
-            "citationCount": 32,
-            "abstract": "探讨了Transformer架构在文本表示学习中的应用和优化方法...",
-            "url": "https://example.com/paper2",
-        },
-        {
-            "title": "预训练语言模型的效率优化策略",
-            "authors": [{"name": "刘强"}, {"name": "陈云"}],
-            "year": 2023,
-            "venue": "软件学报",
-            "citationCount": 28,
-            "abstract": "研究了大规模预训练语言模型的效率优化和部署策略...",
-            "url": "https://example.com/paper3",
-        },
-    ]
+    if not inverted or len(inverted) > MAX_INVERTED_WORDS:
+        return ""
+
+    words = list(inverted.keys())
+    counts = [len(positions) for positions in inverted.values()]
+    positions = np.fromiter(
+        chain.from_iterable(inverted.values()), dtype=np.int64, count=sum(counts)
+    )
+    word_ids = np.repeat(np.arange(len(words)), counts)
+    order = np.argsort(positions, kind="stable")
+
+    return " ".join([words[i] for i in word_ids[order].tolist()])
+
+
+# 示例引用数据，OpenAlex 查询失败时返回，模块加载时构建一次
+_FALLBACK_CITATIONS = (
+    {
+        "title": "深度学习在自然语言处理中的最新进展",
+        "authors": [{"name": "张伟"}, {"name": "李静"}],
+        "year": 2023,
+        "venue": "人工智能学报",
+        "citationCount": 45,
+        "abstract": "本文综述了深度学习在自然语言处理领域的最新研究成果和应用前景...",
+        "url": "https://example.com/paper1",
+    },
+    {
+        "title": "基于Transformer的文本表示学习研究",
+        "authors": [{"name": "王明"}, {"name": "赵雪"}],
+        "year": 2022,
+        "venue": "计算机研究",
+        "citationCount": 32,
+        "abstract": "探讨了Transformer架构在文本表示学习中的应用和优化方法...",
+        "url": "https://example.com/paper2",
+    },
+    {
+        "title": "预训练语言模型的效率优化策略",
+        "authors": [{"name": "刘强"}, {"name": "陈云"}],
+        "year": 2023,
+        "venue": "软件学报",
+        "citationCount": 28,
+        "abstract": "研究了大规模预训练语言模型的效率优化和部署策略...",
+        "url": "https://example.com/paper3",
+    },
+)
+
+
+# 引用验证结果缓存 7 天，过期后重新查询 OpenAlex
+_VERIFY_CACHE = SQLiteCache("verify_cache", ttl=7 * 24 * 3600)
 
 
 @app.route("/api/verify_reference", methods=["POST"])
@@ -580,64 +770,75 @@ def verify_reference():
     if not ref_text:
         return jsonify({"error": "引用文本为空"}), 400
 
+    # 相同引用（忽略大小写和空白差异）直接返回缓存结果
+    cache_key = normalize_text_key(ref_text)
+    cached_result = _VERIFY_CACHE.get(cache_key)
+    if cached_result is not None:
+        logger.info(f"命中引用验证缓存: {ref_text[:50]}...")
+        return jsonify(cached_result)
+
     try:
         logger.info(f"开始智能验证引用: {ref_text[:100]}...")
 
-        # 使用AI提取搜索查询
-        search_query = smart_extract_search_query(
+        # 提取搜索词并搜索OpenAlex（带 DOI 时先按 DOI 查询，查不到再用 AI/规则提取的搜索词）
+        api_key = request.headers.get("X-API-Key")  # 从header获取API Key
+        search_query, ai_extraction_used, papers = search_reference(
             ref_text,
-            request.headers.get("X-API-Key"),  # 从header获取API Key
+            api_key,
             data.get("api_base", "https://api.deepseek.com/v1"),
         )
 
-        logger.info(f"AI提取的搜索词: {search_query}")
-
-        # 搜索OpenAlex
-        papers = search_openalex(search_query, max_results=3)
-
-        if papers:
-            # 找到最佳匹配
-            best_match = find_best_match(ref_text, papers)
-
-            if best_match["score"] > 0.3:  # 匹配度阈值
-                return jsonify(
-                    {
-                        "found": True,
-                        "match_score": best_match["score"],
-                        "data": best_match["paper"],
-                        "search_query_used": search_query,
-                        "ai_extraction_used": True,
-                        "candidates": len(papers),
-                    }
-                )
-            else:
-                return jsonify(
-                    {
-                        "found": False,
-                        "match_score": best_match["score"],
-                        "message": f"找到相关论文但匹配度较低 ({(best_match['score']):.2f})",
-                        "best_candidate": {
-                            "title": best_match["paper"].get("title"),
-                            "year": best_match["paper"].get("year"),
-                            "authors": [
-                                a.get("name")
-                                for a in best_match["paper"].get("authors", [])
-                            ][:3],
-                        },
-                        "search_query_used": search_query,
-                        "ai_extraction_used": True,
-                    }
-                )
-        else:
+        logger.info(f"提取的搜索词: {search_query} (AI: {ai_extraction_used})")
+
+        if not papers:
+            # 搜索失败与无结果无法区分，不写入缓存以便下次重试
             return jsonify(
                 {
                     "found": False,
                     "message": "未找到相关论文",
                     "search_query_used": search_query,
-                    "ai_extraction_used": True,
+                    "ai_extraction_used": ai_extraction_used,
                 }
             )
 
+        # 找到最佳匹配
+        best_match = find_best_match(ref_text, papers)
+
+        if best_match["score"] > 0.3:  # 匹配度阈值
+            # 搜索结果不含摘要，只为匹配成功的论文补全
+            best_paper = best_match["paper"]
+            best_paper["abstract"] = fetch_paper_abstract(best_paper.get("paperId"))
+
+            result = {
+                "found": True,
+                "match_score": best_match["score"],
+                "data": best_match["paper"],
+                "search_query_used": search_query,
+                "ai_extraction_used": ai_extraction_used,
+                "candidates": len(papers),
+            }
+        else:
+            result = {
+                "found": False,
+                "match_score": best_match["score"],
+                "message": f"找到相关论文但匹配度较低 ({(best_match['score']):.2f})",
+                "best_candidate": {
+                    "title": best_match["paper"].get("title"),
+                    "year": best_match["paper"].get("year"),
+                    "authors": [
+                        a.get("name") for a in best_match["paper"].get("authors", [])
+                    ][:3],
+                },
+                "search_query_used": search_query,
+                "ai_extraction_used": ai_extraction_used,
+            }
+
+        # 与 upload_pdf 相同：没有 API Key 时只有规则提取，未匹配的结果不缓存，
+        # 以免之后带 Key 的请求一直拿到较弱的结果
+        if api_key or result["found"]:
+            _VERIFY_CACHE.set(cache_key, result)
+        return jsonify(result)
+
     except Exception as e:
         logger.error(f"智能引用验证错误: {str(e)}")
         # 出错时使用备选方案
@@ -662,11 +863,42 @@ def get_note_filename(pdf_hash, user_id="default"):
     return f"{NOTES_DIR}/{user_id}_{pdf_hash}.json"
 
 
+# 上传接口返回的 PDF 哈希格式（BLAKE2b，16 字节十六进制）
+_PDF_HASH_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
 def calculate_pdf_hash(file_content):
     """计算PDF文件的哈希值作为唯一标识"""
-    import hashlib
+    return hashlib.blake2b(file_content, digest_size=16).hexdigest()
+
+
+def calculate_stream_hash(stream, chunk_size=1 << 20):
+    """分块读取文件流计算哈希值，结果与 calculate_pdf_hash 一致"""
+    file_hash = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def resolve_note_hash(data):
+    """
+    确定笔记对应的 PDF 哈希：优先使用上传接口返回的 pdf_hash，否则根据 pdf_content 计算
+    """
+    pdf_hash = data.get("pdf_hash") or ""
+    if _PDF_HASH_RE.match(pdf_hash):
+        return pdf_hash
+
+    pdf_content = data.get("pdf_content", "")
+    if pdf_content:
+        return calculate_pdf_hash(pdf_content.encode("utf-8"))
+
+    return None
+
 
-    return hashlib.md5(file_content).hexdigest()
+def get_legacy_note_filename(pdf_content, user_id="default"):
+    """旧版本按 MD5(文本内容) 命名的笔记文件"""
+    legacy_hash = hashlib.md5(pdf_content.encode("utf-8")).hexdigest()
+    return get_note_filename(legacy_hash, user_id)
 
 
 @app.route("/api/save_note", methods=["POST"])
@@ -676,16 +908,14 @@ def save_note():
     """
     try:
         data = request.get_json()
-        pdf_content = data.get("pdf_content", "")
         notes = data.get("notes", {})
         user_id = data.get("user_id", "default")  # 可以扩展为多用户
 
-        if not pdf_content:
+        # PDF哈希作为唯一标识
+        pdf_hash = resolve_note_hash(data)
+        if not pdf_hash:
             return jsonify({"error": "PDF内容不能为空"}), 400
 
-        # 计算PDF哈希作为唯一标识
-        pdf_hash = calculate_pdf_hash(pdf_content.encode("utf-8"))
-
         note_data = {
             "pdf_hash": pdf_hash,
             "notes": notes,
@@ -696,8 +926,12 @@ def save_note():
 
         # 保存到文件
         filename = get_note_filename(pdf_hash, user_id)
+        # 紧凑格式写入（仅调试模式下缩进，便于查看）
         with open(filename, "w", encoding="utf-8") as f:
-            json.dump(note_data, f, ensure_ascii=False, indent=2)
+            if app.debug:
+                json.dump(note_data, f, ensure_ascii=False, indent=2)
+            else:
+                json.dump(note_data, f, ensure_ascii=False, separators=(",", ":"))
 
         return jsonify(
             {
@@ -723,26 +957,37 @@ def load_note():
         pdf_content = data.get("pdf_content", "")
         user_id = data.get("user_id", "default")
 
-        if not pdf_content:
+        pdf_hash = resolve_note_hash(data)
+        if not pdf_hash:
             return jsonify({"error": "PDF内容不能为空"}), 400
 
-        pdf_hash = calculate_pdf_hash(pdf_content.encode("utf-8"))
-        filename = get_note_filename(pdf_hash, user_id)
-
-        if os.path.exists(filename):
-            with open(filename, "r", encoding="utf-8") as f:
-                note_data = json.load(f)
-            return jsonify(
-                {
-                    "success": True,
-                    "notes": note_data.get("notes", {}),
-                    "created_at": note_data.get("created_at"),
-                    "updated_at": note_data.get("updated_at"),
-                }
-            )
-        else:
+        candidates = [get_note_filename(pdf_hash, user_id)]
+        # 兼容旧版本保存的笔记
+        if pdf_content:
+            candidates.append(get_legacy_note_filename(pdf_content, user_id))
+
+        # 直接尝试打开，不存在时再看下一个，避免先 exists 再 open 的两次系统调用
+        note_data = None
+        for filename in candidates:
+            try:
+                with open(filename, "rb") as f:
+                    note_data = json.loads(f.read())
+                break
+            except FileNotFoundError:
+                continue
+
+        if note_data is None:
             return jsonify({"success": True, "notes": {}, "message": "未找到现有笔记"})
 
+        return jsonify(
+            {
+                "success": True,
+                "notes": note_data.get("notes", {}),
+                "created_at": note_data.get("created_at"),
+                "updated_at": note_data.get("updated_at"),
+            }
+        )
+
     except Exception as e:
         logger.error(f"加载笔记错误: {str(e)}")
         return jsonify({"error": f"加载失败: {str(e)}"}), 500
@@ -758,39 +1003,39 @@ def export_notes():
         notes = data.get("notes", {})
         paper_title = data.get("paper_title", "未命名论文")
 
-        # 构建 Markdown 内容
-        markdown = f"# 📚 论文笔记：{paper_title}\n\n"
-        markdown += f"**导出时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        markdown += "---\n\n"
+        # 构建 Markdown 内容，先收集片段再一次性拼接
+        parts = [
+            f"# 📚 论文笔记：{paper_title}\n\n",
+            f"**导出时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n",
+            "---\n\n",
+        ]
 
         # 全局笔记
         global_note = notes.get("global", "")
         if global_note:
-            markdown += "## 📝 全局笔记\n\n"
-            markdown += f"{global_note}\n\n"
-            markdown += "---\n\n"
+            parts.append(f"## 📝 全局笔记\n\n{global_note}\n\n---\n\n")
 
-        # 页面笔记
+        # 页面笔记，排序输出时顺便统计页数和字数
         pages = notes.get("pages", {})
+        page_count = 0
+        page_chars = 0
         if pages:
-            markdown += "## 📄 页面笔记\n\n"
-
-            # 按页码排序
-            sorted_pages = sorted(pages.items(), key=lambda x: int(x[0]))
+            parts.append("## 📄 页面笔记\n\n")
 
-            for page_num, content in sorted_pages:
+            for page_num, content in sorted(pages.items(), key=lambda x: int(x[0])):
                 if content:  # 只导出有内容的页面
-                    markdown += f"### 第 {page_num} 页\n\n"
-                    markdown += f"{content}\n\n"
+                    parts.append(f"### 第 {page_num} 页\n\n{content}\n\n")
+                    page_count += 1
+                    page_chars += len(content)
 
-            markdown += "---\n\n"
+            parts.append("---\n\n")
 
         # 统计信息
-        page_count = len([p for p in pages.values() if p])
-        markdown += "## 📊 统计\n\n"
-        markdown += f"- 全局笔记字数: {len(global_note)} 字\n"
-        markdown += f"- 页面笔记数量: {page_count} 页\n"
-        markdown += f"- 总字数: {len(global_note) + sum(len(p) for p in pages.values() if p)} 字\n"
+        parts.append("## 📊 统计\n\n")
+        parts.append(f"- 全局笔记字数: {len(global_note)} 字\n")
+        parts.append(f"- 页面笔记数量: {page_count} 页\n")
+        parts.append(f"- 总字数: {len(global_note) + page_chars} 字\n")
+        markdown = "".join(parts)
 
         return jsonify(
             {
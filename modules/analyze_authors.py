@@ -1,14 +1,105 @@
+import json
 import requests
 import logging
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from urllib.parse import quote_plus
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+from urllib3.util.retry import Retry
 import scholarly
+from modules.rate_limiter import OPENALEX_LIMITER
+from modules.sqlite_cache import SQLiteCache
 
 logger = logging.getLogger(__name__)
 
+# 单次 Retry-After 等待的上限（秒），避免服务端给出很长的等待时间时长时间占住请求线程
+RETRY_AFTER_MAX = 5
+
+
+class BoundedRetry(Retry):
+    """
+    遵循 Retry-After，但单次等待不超过 RETRY_AFTER_MAX 秒
+    """
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, RETRY_AFTER_MAX)
+
+
+# OpenAlex / ORCID 共用的连接池会话，复用 TCP+TLS 连接；5xx/429 自动退避重试
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=BoundedRetry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=True,  # 429/503 按服务端给出的 Retry-After 等待（有上限）
+        raise_on_status=False,
+    ),
+))
+_SESSION.headers.update({
+    'User-Agent': 'PaperLens/1.0 (mailto:jyiii058278@gmail.com)',
+    'Accept': 'application/json',
+    # 显式声明压缩响应；br 仅在安装了 brotli 解码器时由 urllib3 加入，避免收到无法解压的内容
+    'Accept-Encoding': DEFAULT_ACCEPT_ENCODING,
+})
+
+# 作者元数据变化很慢，ORCID 详情、OpenAlex 作者对象和近期论文各缓存 24 小时
+AUTHOR_CACHE_TTL = 24 * 3600
+_ORCID_CACHE = SQLiteCache("orcid_cache", ttl=AUTHOR_CACHE_TTL)
+_AUTHOR_CACHE = SQLiteCache("openalex_author_cache", ttl=AUTHOR_CACHE_TTL)
+_AUTHOR_PAPERS_CACHE = SQLiteCache("openalex_author_papers_cache", ttl=AUTHOR_CACHE_TTL)
+_PAPER_WORKS_CACHE = SQLiteCache("openalex_paper_works_cache", ttl=AUTHOR_CACHE_TTL)
+_SCHOLAR_CACHE = SQLiteCache("scholar_author_cache", ttl=AUTHOR_CACHE_TTL)
+
+# OpenAlex 的 OR 过滤单次最多 50 个值
+AUTHOR_BULK_SIZE = 50
+
+# 每位作者保留的近期论文数；批量拉取时按游标翻页，最多翻 AUTHOR_PAPERS_MAX_PAGES 页
+RECENT_PAPERS_PER_AUTHOR = 5
+AUTHOR_PAPERS_PAGE_SIZE = 200
+AUTHOR_PAPERS_MAX_PAGES = 3
+
+# 只请求实际用到的字段，减小 OpenAlex 响应体积
+AUTHOR_SELECT_FIELDS = 'id,display_name,orcid,works_count,cited_by_count,summary_stats,last_known_institutions,x_concepts'
+WORK_SELECT_FIELDS = 'id,doi,title,publication_year,cited_by_count,primary_location'
+PAPER_SEARCH_SELECT_FIELDS = 'id,title,authorships'
+
+# 作者名综合评分的匹配阈值
+AUTHOR_MATCH_THRESHOLD = 0.5
+
+# ORCID 详情和作者论文列表互不依赖，放到共享线程池里并发请求
+_IO_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="author-io")
+
+
+def openalex_get(url, params=None, timeout=10):
+    """
+    经客户端限速后请求 OpenAlex；429/5xx 由会话按 Retry-After 退避重试
+    """
+    OPENALEX_LIMITER.acquire()
+    return _SESSION.get(url, params=params, timeout=timeout)
+
+
+def scholar_url(name):
+    """构建 Google Scholar 作者搜索链接，姓名中的 &、#、非 ASCII 字符等会被正确编码"""
+    return f"https://scholar.google.com/scholar?q=author:{quote_plus(name)}"
+
+
 def get_author_from_google_scholar(author_name):
     """
-    从 Google Scholar 获取作者信息
+    从 Google Scholar 获取作者信息（较慢，仅作为 OpenAlex 失败时的备选，成功结果缓存）
     """
+    cache_key = ' '.join(author_name.lower().split())
+    cached = _SCHOLAR_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         # 搜索作者
         search_query = scholarly.search_author(author_name)
@@ -25,27 +116,18 @@ def get_author_from_google_scholar(author_name):
         affiliations = [affiliation] if affiliation else []
         
         # 提取近期论文
-        publications = author_data.get('publications', [])[:5]
-        recent_papers = []
-        for pub in publications:
-            paper_info = {
-                'title': pub.get('bib', {}).get('title', ''),
-                'year': pub.get('bib', {}).get('pub_year', ''),
-                'citationCount': pub.get('num_citations', 0),
-                'venue': pub.get('bib', {}).get('venue', '') or pub.get('bib', {}).get('journal', ''),
-                'url': pub.get('pub_url', '') or pub.get('eprint_url', '')
-            }
-            recent_papers.append(paper_info)
+        publications = author_data.get('publications', [])
+        recent_papers = [scholar_pub_to_paper(pub) for pub in publications[:5]]
         
         # 构建 Google Scholar 主页链接
         scholar_id = author_data.get('scholar_id', '')
         homepage = f"https://scholar.google.com/citations?user={scholar_id}" if scholar_id else ''
         
-        return {
+        result = {
             "name": author_data.get('name', author_name),
             "affiliations": affiliations,
             "affiliation": affiliation,  # 单独保存完整机构名
-            "paperCount": len(author_data.get('publications', [])),
+            "paperCount": len(publications),
             "citationCount": author_data.get('citedby', 0),
             "hIndex": author_data.get('hindex', 0),
             "i10Index": author_data.get('i10index', 0),
@@ -57,6 +139,8 @@ def get_author_from_google_scholar(author_name):
             "searchSuccess": True,
             "source": "Google Scholar"
         }
+        _SCHOLAR_CACHE.set(cache_key, result)
+        return result
         
     except StopIteration:
         return create_fallback_author(author_name, "未找到匹配作者")
@@ -65,6 +149,18 @@ def get_author_from_google_scholar(author_name):
         return create_fallback_author(author_name, str(e))
 
 
+def scholar_pub_to_paper(pub):
+    """将 scholarly 的 publication 转换为近期论文条目"""
+    bib = pub.get('bib') or {}
+    return {
+        'title': bib.get('title', ''),
+        'year': bib.get('pub_year', ''),
+        'citationCount': pub.get('num_citations', 0),
+        'venue': bib.get('venue', '') or bib.get('journal', ''),
+        'url': pub.get('pub_url', '') or pub.get('eprint_url', '')
+    }
+
+
 def get_orcid_details(orcid_url):
     """
     从 ORCID 获取详细的机构信息和研究兴趣
@@ -76,22 +172,24 @@ def get_orcid_details(orcid_url):
         # 提取 ORCID ID
         orcid_id = orcid_url.replace('https://orcid.org/', '').strip('/')
         
+        cached = _ORCID_CACHE.get(orcid_id)
+        if cached is not None:
+            return tuple(cached)
+        
         # ORCID API 请求
         api_url = f"https://pub.orcid.org/v3.0/{orcid_id}"
-        headers = {
-            'Accept': 'application/json',
-            'User-Agent': 'PaperLens/1.0'
-        }
         
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = _SESSION.get(api_url, timeout=10)
         
         if response.status_code != 200:
             return None, None
         
-        data = response.json()
+        data = json.loads(response.content)
         
-        # 提取机构信息
-        affiliations = []
+        # 提取机构信息，seen 用于 O(1) 去重
+        current_affiliations = []
+        past_affiliations = []
+        seen = set()
         
         # 从 employments 获取工作机构
         employments = data.get('activities-summary', {}).get('employments', {}).get('affiliation-group', [])
@@ -101,13 +199,18 @@ def get_orcid_details(orcid_url):
                 emp = summary.get('employment-summary', {})
                 org = emp.get('organization', {})
                 org_name = org.get('name', '')
-                if org_name and org_name not in affiliations:
+                if org_name and org_name not in seen:
+                    seen.add(org_name)
                     # 检查是否是当前职位（没有结束日期）
                     end_date = emp.get('end-date')
-                    if end_date is None:  # 当前职位优先
-                        affiliations.insert(0, org_name)
+                    if end_date is None:
+                        current_affiliations.append(org_name)
                     else:
-                        affiliations.append(org_name)
+                        past_affiliations.append(org_name)
+        
+        # 当前职位优先，且后出现的排在前面（与逐个插入表头的顺序一致）
+        current_affiliations.reverse()
+        affiliations = current_affiliations + past_affiliations
         
         # 从 educations 获取教育机构（作为备选）
         if not affiliations:
@@ -118,11 +221,13 @@ def get_orcid_details(orcid_url):
                     edu = summary.get('education-summary', {})
                     org = edu.get('organization', {})
                     org_name = org.get('name', '')
-                    if org_name and org_name not in affiliations:
+                    if org_name and org_name not in seen:
+                        seen.add(org_name)
                         affiliations.append(org_name)
         
         # 提取研究兴趣/关键词
         interests = []
+        seen_interests = set()
         
         # 从 keywords 获取
         keywords = data.get('person', {}).get('keywords', {}).get('keyword', [])
@@ -132,13 +237,16 @@ def get_orcid_details(orcid_url):
                 # 可能包含多个关键词，用逗号或分号分隔
                 for term in content.replace(';', ',').split(','):
                     term = term.strip()
-                    if term and term not in interests:
+                    if term and term not in seen_interests:
+                        seen_interests.add(term)
                         interests.append(term)
         
         # 从 researcher-urls 中也可能获取研究领域信息
         # 从 biography 中提取（可选，需要NLP处理，这里简化处理）
         
-        return affiliations[:5], interests[:10]  # 限制数量
+        result = (affiliations[:5], interests[:10])  # 限制数量
+        _ORCID_CACHE.set(orcid_id, result)
+        return result
         
     except Exception as e:
         logger.error(f"ORCID 获取详情失败: {e}")
@@ -150,8 +258,6 @@ def get_author_from_openalex(author_name):
     从 OpenAlex 获取作者信息（备选方案）
     """
     try:
-        headers = {'User-Agent': 'PaperLens/1.0 (mailto:jyiii058278@gmail.com)'}
-        
         # 搜索作者
         search_url = "https://api.openalex.org/authors"
         params = {
@@ -159,12 +265,12 @@ def get_author_from_openalex(author_name):
             'per_page': 1
         }
         
-        response = requests.get(search_url, params=params, headers=headers, timeout=10)
+        response = openalex_get(search_url, params=params, timeout=10)
         
         if response.status_code != 200:
             return create_fallback_author(author_name, f"OpenAlex 错误: {response.status_code}")
         
-        data = response.json()
+        data = json.loads(response.content)
         results = data.get('results', [])
         
         if not results:
@@ -183,9 +289,14 @@ def get_author_from_openalex(author_name):
         
         # 获取 ORCID
         orcid = author.get('orcid', '')
+        author_id = author.get('id', '').replace('https://openalex.org/', '')
+        
+        # 同时请求 ORCID 详情和作者论文
+        orcid_future = _IO_EXECUTOR.submit(get_orcid_details, orcid)
+        papers_future = _IO_EXECUTOR.submit(get_author_papers_from_openalex, author_id)
         
         # 从 ORCID 获取机构和研究兴趣
-        orcid_affiliations, orcid_interests = get_orcid_details(orcid)
+        orcid_affiliations, orcid_interests = orcid_future.result()
         
         # 使用 ORCID 的机构信息，如果没有则回退到 OpenAlex
         if orcid_affiliations:
@@ -193,10 +304,12 @@ def get_author_from_openalex(author_name):
         else:
             # 回退到 OpenAlex 的机构信息
             affiliations = []
+            seen = set()
             last_institutions = author.get('last_known_institutions', [])
             for inst in last_institutions:
                 inst_name = inst.get('display_name', '')
-                if inst_name and inst_name not in affiliations:
+                if inst_name and inst_name not in seen:
+                    seen.add(inst_name)
                     affiliations.append(inst_name)
         
         # 使用 ORCID 的研究兴趣，如果没有则回退到 OpenAlex
@@ -207,12 +320,11 @@ def get_author_from_openalex(author_name):
             interests = [c.get('display_name', '') for c in author.get('x_concepts', [])[:5] if c.get('display_name')]
         
         # 获取作者论文
-        author_id = author.get('id', '').replace('https://openalex.org/', '')
-        papers = get_author_papers_from_openalex(author_id, headers)
+        papers = papers_future.result()
         
         # 构建 Google Scholar 搜索链接作为主页
         author_display_name = author.get('display_name', author_name)
-        google_scholar_url = f"https://scholar.google.com/scholar?q=author:{author_display_name.replace(' ', '+')}"
+        google_scholar_url = scholar_url(author_display_name)
         
         # 保留 OpenAlex URL 作为备用
         openalex_url = author.get('id', '')
@@ -236,43 +348,52 @@ def get_author_from_openalex(author_name):
         }
         
     except Exception as e:
-        logger.error(f"OpenAlex 错误 {author_name}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"OpenAlex 错误 {author_name}: {str(e)}")
         return create_fallback_author(author_name, str(e))
 
 
-def get_author_papers_from_openalex(author_id, headers):
+def work_to_paper(work):
+    """将 OpenAlex work 转换为近期论文条目"""
+    # 提取 DOI URL
+    doi = work.get('doi', '')
+    url = doi if doi else work.get('id', '')
+    
+    # primary_location / source 可能为 null
+    source = (work.get('primary_location') or {}).get('source') or {}
+    
+    return {
+        'title': work.get('title', ''),
+        'year': work.get('publication_year', ''),
+        'citationCount': work.get('cited_by_count', 0),
+        'venue': source.get('display_name', ''),
+        'url': url
+    }
+
+
+def get_author_papers_from_openalex(author_id):
     """获取作者的论文列表"""
     try:
+        cached = _AUTHOR_PAPERS_CACHE.get(author_id)
+        if cached is not None:
+            return cached
+        
         papers_url = "https://api.openalex.org/works"
         params = {
             'filter': f'author.id:{author_id}',
-            'per_page': 5,
-            'sort': 'publication_date:desc'
+            'per_page': RECENT_PAPERS_PER_AUTHOR,
+            'sort': 'publication_date:desc',
+            'select': WORK_SELECT_FIELDS
         }
         
-        response = requests.get(papers_url, params=params, headers=headers, timeout=10)
+        response = openalex_get(papers_url, params=params, timeout=10)
         
         if response.status_code != 200:
             return []
         
-        data = response.json()
-        papers = []
-        
-        for work in data.get('results', []):
-            # 提取 DOI URL
-            doi = work.get('doi', '')
-            url = doi if doi else work.get('id', '')
-            
-            papers.append({
-                'title': work.get('title', ''),
-                'year': work.get('publication_year', ''),
-                'citationCount': work.get('cited_by_count', 0),
-                'venue': work.get('primary_location', {}).get('source', {}).get('display_name', ''),
-                'url': url
-            })
+        data = json.loads(response.content)
+        papers = [work_to_paper(work) for work in data.get('results', [])]
         
+        _AUTHOR_PAPERS_CACHE.set(author_id, papers)
         return papers
         
     except Exception as e:
@@ -284,11 +405,9 @@ def get_author_from_openalex_by_paper(author_name, paper_title):
     通过论文标题和作者名联合搜索，确保找到正确的作者
     """
     try:
-        headers = {'User-Agent': 'PaperLens/1.0 (mailto:jyiii058278@gmail.com)'}
-        
         # 先搜索论文，从论文作者中找到匹配的作者
         if paper_title:
-            author_info = find_author_from_paper(author_name, paper_title, headers)
+            author_info = find_author_from_paper(author_name, paper_title)
             if author_info and author_info.get('searchSuccess'):
                 return author_info
         
@@ -301,26 +420,174 @@ def get_author_from_openalex_by_paper(author_name, paper_title):
         return create_fallback_author(author_name, str(e))
 
 
-def find_author_from_paper(author_name, paper_title, headers):
+def search_works_by_title(paper_title):
     """
-    通过论文标题搜索，然后从论文作者中找到匹配的作者
+    按标题搜索论文，同一标题的结果会被缓存；请求失败时返回 None
     """
-    try:
-        # 搜索论文
-        works_url = "https://api.openalex.org/works"
+    cache_key = ' '.join(paper_title.lower().split())
+    works = _PAPER_WORKS_CACHE.get(cache_key)
+    if works is not None:
+        return works
+    
+    works_url = "https://api.openalex.org/works"
+    params = {
+        'search': paper_title,
+        'per_page': 5,  # 获取多个结果以提高匹配几率
+        'select': PAPER_SEARCH_SELECT_FIELDS
+    }
+    
+    response = openalex_get(works_url, params=params, timeout=15)
+    
+    if response.status_code != 200:
+        logger.warning(f"论文搜索失败: {response.status_code}")
+        return None
+    
+    works = json.loads(response.content).get('results', [])
+    _PAPER_WORKS_CACHE.set(cache_key, works)
+    return works
+
+
+def fetch_authors_bulk(author_ids):
+    """
+    用 openalex 的 OR 过滤批量获取作者对象并写入缓存，返回 {短 ID: 作者对象}
+    """
+    short_ids = list(dict.fromkeys(aid.rsplit('/', 1)[-1] for aid in author_ids if aid))
+    
+    authors = {}
+    missing = []
+    for short_id in short_ids:
+        cached = _AUTHOR_CACHE.get(short_id)
+        if cached is not None:
+            authors[short_id] = cached
+        else:
+            missing.append(short_id)
+    
+    for start in range(0, len(missing), AUTHOR_BULK_SIZE):
+        chunk = missing[start:start + AUTHOR_BULK_SIZE]
         params = {
-            'search': paper_title,
-            'per_page': 5  # 获取多个结果以提高匹配几率
+            'filter': 'openalex:' + '|'.join(chunk),
+            'per_page': AUTHOR_BULK_SIZE,
+            'select': AUTHOR_SELECT_FIELDS
         }
         
-        response = requests.get(works_url, params=params, headers=headers, timeout=15)
+        try:
+            response = openalex_get("https://api.openalex.org/authors", params=params, timeout=15)
+        except requests.RequestException as e:
+            logger.warning(f"批量获取作者失败: {e}")
+            continue
         
         if response.status_code != 200:
-            logger.warning(f"论文搜索失败: {response.status_code}")
-            return None
+            logger.warning(f"批量获取作者失败: {response.status_code}")
+            continue
         
-        data = response.json()
-        works = data.get('results', [])
+        results = json.loads(response.content).get('results', [])
+        if len(results) < len(chunk):
+            logger.warning(f"批量获取作者不完整: 请求 {len(chunk)} 位，返回 {len(results)} 位")
+        
+        for author in results:
+            short_id = author.get('id', '').rsplit('/', 1)[-1]
+            _AUTHOR_CACHE.set(short_id, author)
+            authors[short_id] = author
+    
+    return authors
+
+
+def fetch_author_papers_bulk(author_ids):
+    """
+    用 author.id 的 OR 过滤按时间倒序批量拉取多位作者的论文，游标翻页，
+    按作者分组后各取最近几篇写入缓存，返回 {短 ID: 论文列表}
+    """
+    short_ids = list(dict.fromkeys(aid.rsplit('/', 1)[-1] for aid in author_ids if aid))
+    missing = [short_id for short_id in short_ids if _AUTHOR_PAPERS_CACHE.get(short_id) is None]
+    
+    papers_by_author = {}
+    for start in range(0, len(missing), AUTHOR_BULK_SIZE):
+        chunk = missing[start:start + AUTHOR_BULK_SIZE]
+        wanted = set(chunk)
+        grouped = defaultdict(list)
+        params = {
+            'filter': 'author.id:' + '|'.join(chunk),
+            'per_page': AUTHOR_PAPERS_PAGE_SIZE,
+            'sort': 'publication_date:desc',
+            'select': WORK_SELECT_FIELDS + ',authorships',
+            'cursor': '*'
+        }
+        
+        exhausted = False
+        for _ in range(AUTHOR_PAPERS_MAX_PAGES):
+            try:
+                response = openalex_get("https://api.openalex.org/works", params=params, timeout=15)
+            except requests.RequestException as e:
+                logger.warning(f"批量获取作者论文失败: {e}")
+                break
+            
+            if response.status_code != 200:
+                logger.warning(f"批量获取作者论文失败: {response.status_code}")
+                break
+            
+            data = json.loads(response.content)
+            for work in data.get('results', []):
+                paper = None
+                for authorship in work.get('authorships') or []:
+                    short_id = ((authorship.get('author') or {}).get('id') or '').rsplit('/', 1)[-1]
+                    if short_id in wanted and len(grouped[short_id]) < RECENT_PAPERS_PER_AUTHOR:
+                        paper = paper or work_to_paper(work)
+                        grouped[short_id].append(paper)
+            
+            next_cursor = (data.get('meta') or {}).get('next_cursor')
+            if not next_cursor or not data.get('results'):
+                exhausted = True
+                break
+            if all(len(grouped[short_id]) >= RECENT_PAPERS_PER_AUTHOR for short_id in chunk):
+                break
+            params['cursor'] = next_cursor
+        
+        # 只缓存已凑满或确实没有更多论文的作者，其余留给单独查询
+        for short_id in chunk:
+            papers = grouped.get(short_id, [])
+            if exhausted or len(papers) >= RECENT_PAPERS_PER_AUTHOR:
+                _AUTHOR_PAPERS_CACHE.set(short_id, papers)
+                papers_by_author[short_id] = papers
+    
+    return papers_by_author
+
+
+def prefetch_paper_authors(author_names, paper_title):
+    """
+    团队分析前预取：论文只搜索一次，匹配出所有作者 ID 后批量获取作者详情和近期论文，
+    之后逐个作者查询时直接命中缓存
+    """
+    try:
+        works = search_works_by_title(paper_title)
+        best_work = find_best_matching_work(works, paper_title) if works else None
+        if not best_work:
+            return {}
+        
+        authorships = best_work.get('authorships', [])
+        author_ids = []
+        for name in author_names:
+            matched_author = find_matching_author(authorships, name)
+            if matched_author:
+                author_ids.append(matched_author.get('author', {}).get('id', ''))
+        
+        authors = fetch_authors_bulk(author_ids)
+        fetch_author_papers_bulk(author['id'] for author in authors.values() if author.get('id'))
+        return authors
+        
+    except Exception as e:
+        logger.warning(f"预取论文作者失败: {e}")
+        return {}
+
+
+def find_author_from_paper(author_name, paper_title):
+    """
+    通过论文标题搜索，然后从论文作者中找到匹配的作者
+    """
+    try:
+        # 搜索论文
+        works = search_works_by_title(paper_title)
+        if works is None:
+            return None
         
         if not works:
             logger.warning(f"未找到论文: {paper_title[:50]}...")
@@ -345,7 +612,7 @@ def find_author_from_paper(author_name, paper_title, headers):
         # 获取完整的作者详情
         author_id = matched_author.get('author', {}).get('id', '')
         if author_id:
-            return get_author_details_by_id(author_id, author_name, matched_author, headers)
+            return get_author_details_by_id(author_id, author_name, matched_author)
         
         return None
         
@@ -358,18 +625,24 @@ def find_best_matching_work(works, target_title):
     """
     在搜索结果中找到标题最匹配的论文
     """
-    from difflib import SequenceMatcher
-    
     target_title_lower = target_title.lower().strip()
     best_match = None
     best_ratio = 0
     
+    # 复用同一个 SequenceMatcher，目标标题固定为 seq1（与原先的参数顺序一致，ratio 结果不变）
+    matcher = SequenceMatcher(None, target_title_lower, target_title_lower)
+    
     for work in works:
         work_title = work.get('title', '') or ''
         work_title_lower = work_title.lower().strip()
+        matcher.set_seq2(work_title_lower)
+        
+        # 先用廉价的上界估计剪枝，上界都不超过当前最优时无需计算精确相似度
+        if matcher.real_quick_ratio() <= best_ratio or matcher.quick_ratio() <= best_ratio:
+            continue
         
         # 计算相似度
-        ratio = SequenceMatcher(None, target_title_lower, work_title_lower).ratio()
+        ratio = matcher.ratio()
         
         if ratio > best_ratio:
             best_ratio = ratio
@@ -388,31 +661,41 @@ def find_matching_author(authorships, target_name):
     """
     在论文作者列表中找到匹配的作者
     """
-    from difflib import SequenceMatcher
-    
     target_name_lower = target_name.lower().strip()
-    target_parts = set(target_name_lower.split())
+    target_tokens = target_name_lower.split()
+    target_parts = set(target_tokens)
+    # 姓氏（通常最后一个词）在循环外只计算一次
+    target_last = target_tokens[-1] if target_tokens else ''
     
     best_match = None
     best_score = 0
     
+    matcher = SequenceMatcher(None, target_name_lower, target_name_lower)
+    
     for authorship in authorships:
         author = authorship.get('author', {})
         author_name = author.get('display_name', '') or ''
         author_name_lower = author_name.lower().strip()
-        author_parts = set(author_name_lower.split())
-        
-        # 方法1: 完整名字相似度
-        ratio = SequenceMatcher(None, target_name_lower, author_name_lower).ratio()
+        author_tokens = author_name_lower.split()
+        author_parts = set(author_tokens)
         
         # 方法2: 名字部分重叠（处理名字顺序不同的情况）
         overlap = len(target_parts & author_parts) / max(len(target_parts), len(author_parts), 1)
         
         # 方法3: 检查姓氏匹配（通常最后一个词是姓氏）
-        target_last = target_name_lower.split()[-1] if target_name_lower.split() else ''
-        author_last = author_name_lower.split()[-1] if author_name_lower.split() else ''
+        author_last = author_tokens[-1] if author_tokens else ''
         last_name_match = 1.0 if target_last == author_last else 0.0
         
+        # 廉价预筛：即使全名相似度为 1 也达不到阈值的候选（没有共同的名字部分）直接跳过
+        if 0.4 + overlap * 0.3 + last_name_match * 0.3 < AUTHOR_MATCH_THRESHOLD:
+            continue
+        
+        # 方法1: 完整名字相似度，用 quick_ratio 上界剪枝后再算精确值
+        matcher.set_seq2(author_name_lower)
+        if matcher.quick_ratio() * 0.4 + overlap * 0.3 + last_name_match * 0.3 <= best_score:
+            continue
+        ratio = matcher.ratio()
+        
         # 综合评分
         score = ratio * 0.4 + overlap * 0.3 + last_name_match * 0.3
         
@@ -421,7 +704,7 @@ def find_matching_author(authorships, target_name):
             best_match = authorship
     
     # 设置阈值
-    if best_score >= 0.5:
+    if best_score >= AUTHOR_MATCH_THRESHOLD:
         matched_name = best_match.get('author', {}).get('display_name', '')
         logger.info(f"作者匹配: {target_name} -> {matched_name} (score: {best_score:.2f})")
         return best_match
@@ -429,10 +712,11 @@ def find_matching_author(authorships, target_name):
     return None
 
 
-def get_author_details_by_id(author_id, original_name, authorship_info, headers):
+def get_author_details_by_id(author_id, original_name, authorship_info):
     """
     通过作者 ID 获取完整的作者详情
     """
+    author = None
     try:
         # 从 authorship 中提取基本信息
         author_basic = authorship_info.get('author', {})
@@ -449,36 +733,50 @@ def get_author_details_by_id(author_id, original_name, authorship_info, headers)
         else:
             author_url = f"https://api.openalex.org/authors/{author_id}"
         
-        logger.info(f"请求作者 API: {author_url}")
-        
-        response = requests.get(author_url, headers=headers, timeout=10)
-        
-        if response.status_code != 200:
-            logger.warning(f"作者详情请求失败: {response.status_code}")
-            # 如果获取详情失败，使用 authorship 中的信息，但尝试单独获取统计数据
-            return build_author_from_authorship(original_name, authorship_info, headers)
+        # 以短 ID（如 A1234567890）作为缓存键
+        cache_key = author_url.rsplit('/', 1)[-1]
+        author = _AUTHOR_CACHE.get(cache_key)
         
-        author = response.json()
+        if author is None:
+            logger.info(f"请求作者 API: {author_url}")
+            
+            response = openalex_get(author_url, params={'select': AUTHOR_SELECT_FIELDS}, timeout=10)
+            
+            if response.status_code != 200:
+                logger.warning(f"作者详情请求失败: {response.status_code}")
+                # 会话已对 429/5xx 重试过，不再重复请求同一 URL，直接使用 authorship 中的信息
+                return build_author_from_authorship(original_name, authorship_info)
+            
+            author = json.loads(response.content)
+            _AUTHOR_CACHE.set(cache_key, author)
         
         # 获取 ORCID
         orcid = author.get('orcid', '')
+        author_id_for_papers = author.get('id', '').replace('https://openalex.org/', '')
+        
+        # 同时请求 ORCID 详情和作者论文
+        orcid_future = _IO_EXECUTOR.submit(get_orcid_details, orcid)
+        papers_future = _IO_EXECUTOR.submit(get_author_papers_from_openalex, author_id_for_papers)
         
         # 从 ORCID 获取机构和研究兴趣
-        orcid_affiliations, orcid_interests = get_orcid_details(orcid)
+        orcid_affiliations, orcid_interests = orcid_future.result()
         
         # 机构信息：优先使用论文中的机构 -> ORCID -> OpenAlex
         affiliations = []
+        seen = set()
         
         # 首先使用论文中的机构（最准确，代表发表该论文时的机构）
         for inst in institutions:
             inst_name = inst.get('display_name', '')
-            if inst_name and inst_name not in affiliations:
+            if inst_name and inst_name not in seen:
+                seen.add(inst_name)
                 affiliations.append(inst_name)
         
         # 补充 ORCID 机构
         if orcid_affiliations:
             for aff in orcid_affiliations:
-                if aff not in affiliations:
+                if aff not in seen:
+                    seen.add(aff)
                     affiliations.append(aff)
         
         # 补充 OpenAlex 最新机构
@@ -486,7 +784,8 @@ def get_author_details_by_id(author_id, original_name, authorship_info, headers)
             last_institutions = author.get('last_known_institutions', [])
             for inst in last_institutions:
                 inst_name = inst.get('display_name', '')
-                if inst_name and inst_name not in affiliations:
+                if inst_name and inst_name not in seen:
+                    seen.add(inst_name)
                     affiliations.append(inst_name)
         
         # 研究兴趣
@@ -505,11 +804,10 @@ def get_author_details_by_id(author_id, original_name, authorship_info, headers)
         logger.info(f"作者统计: {original_name} - 论文:{works_count}, 引用:{cited_by_count}, H:{h_index}, i10:{i10_index}")
         
         # 获取作者论文
-        author_id_for_papers = author.get('id', '').replace('https://openalex.org/', '')
-        papers = get_author_papers_from_openalex(author_id_for_papers, headers)
+        papers = papers_future.result()
         
         author_display_name = author.get('display_name', original_name)
-        google_scholar_url = f"https://scholar.google.com/scholar?q=author:{author_display_name.replace(' ', '+')}"
+        google_scholar_url = scholar_url(author_display_name)
         
         return {
             "name": author_display_name,
@@ -531,16 +829,15 @@ def get_author_details_by_id(author_id, original_name, authorship_info, headers)
         }
         
     except Exception as e:
-        logger.error(f"获取作者详情失败: {e}")
-        import traceback
-        traceback.print_exc()
-        return build_author_from_authorship(original_name, authorship_info, headers)
+        logger.exception(f"获取作者详情失败: {e}")
+        # 复用已获取的作者对象，避免再次请求
+        return build_author_from_authorship(original_name, authorship_info, author)
 
 
-def build_author_from_authorship(author_name, authorship_info, headers=None):
+def build_author_from_authorship(author_name, authorship_info, author_data=None):
     """
     从 authorship 信息构建基本作者信息
-    如果可能，尝试通过作者 ID 获取统计数据
+    如果已获取到 OpenAlex 作者对象，则从中补充统计数据
     """
     author_basic = authorship_info.get('author', {})
     institutions = authorship_info.get('institutions', [])
@@ -548,9 +845,8 @@ def build_author_from_authorship(author_name, authorship_info, headers=None):
     affiliations = [inst.get('display_name', '') for inst in institutions if inst.get('display_name')]
     
     display_name = author_basic.get('display_name', author_name)
-    google_scholar_url = f"https://scholar.google.com/scholar?q=author:{display_name.replace(' ', '+')}"
+    google_scholar_url = scholar_url(display_name)
     
-    # 尝试从作者 ID 获取基本统计
     author_id = author_basic.get('id', '')
     works_count = 0
     cited_by_count = 0
@@ -559,30 +855,20 @@ def build_author_from_authorship(author_name, authorship_info, headers=None):
     orcid = author_basic.get('orcid', '')
     papers = []
     
-    if author_id and headers:
+    if author_data:
         try:
-            # 尝试获取作者统计数据
-            if author_id.startswith('https://openalex.org/'):
-                author_id_clean = author_id.replace('https://openalex.org/', '')
-                author_url = f"https://api.openalex.org/authors/{author_id_clean}"
-            else:
-                author_url = f"https://api.openalex.org/authors/{author_id}"
+            works_count = author_data.get('works_count', 0)
+            cited_by_count = author_data.get('cited_by_count', 0)
+            summary_stats = author_data.get('summary_stats', {})
+            h_index = summary_stats.get('h_index', 0)
+            i10_index = summary_stats.get('i10_index', 0)
+            orcid = author_data.get('orcid', '') or orcid
             
-            response = requests.get(author_url, headers=headers, timeout=5)
-            if response.status_code == 200:
-                author_data = response.json()
-                works_count = author_data.get('works_count', 0)
-                cited_by_count = author_data.get('cited_by_count', 0)
-                summary_stats = author_data.get('summary_stats', {})
-                h_index = summary_stats.get('h_index', 0)
-                i10_index = summary_stats.get('i10_index', 0)
-                orcid = author_data.get('orcid', '') or orcid
-                
-                # 获取论文
-                author_id_for_papers = author_data.get('id', '').replace('https://openalex.org/', '')
-                papers = get_author_papers_from_openalex(author_id_for_papers, headers)
-                
-                logger.info(f"备选方式获取统计成功: {display_name}")
+            # 获取论文
+            author_id_for_papers = author_data.get('id', '').replace('https://openalex.org/', '')
+            papers = get_author_papers_from_openalex(author_id_for_papers)
+            
+            logger.info(f"备选方式获取统计成功: {display_name}")
         except Exception as e:
             logger.warning(f"备选统计获取失败: {e}")
     
@@ -610,12 +896,21 @@ def generate_team_analysis(authors):
     """
     生成团队分析数据
     """
+    if not authors:
+        return {
+            "totalPapers": 0,
+            "totalCitations": 0,
+            "avgHIndex": 0,
+            "institutionDistribution": {},
+            "researchInterests": {}
+        }
+    
     total_papers = 0
     total_citations = 0
     total_h_index = 0
     h_index_count = 0
-    institution_distribution = {}
-    research_interests = {}
+    institution_counter = Counter()
+    interest_counter = Counter()
     
     for author in authors:
         # 统计论文和引用
@@ -632,26 +927,23 @@ def generate_team_analysis(authors):
         affiliation = author.get('affiliation', '') or ''
         if affiliation:
             # 简化机构名称（去掉过长的部分）
-            simplified_name = affiliation.split(',')[0].strip()
-            institution_distribution[simplified_name] = institution_distribution.get(simplified_name, 0) + 1
+            institution_counter[affiliation.split(',')[0].strip()] += 1
         
-        # 研究兴趣
+        # 研究兴趣，每个作者最多取5个
         interests = author.get('interests', []) or []
-        for interest in interests[:5]:  # 每个作者最多取5个
-            if interest:
-                research_interests[interest] = research_interests.get(interest, 0) + 1
+        interest_counter.update(interest for interest in interests[:5] if interest)
     
     # 计算平均 H 指数
     avg_h_index = round(total_h_index / h_index_count, 1) if h_index_count > 0 else 0
     
-    # 排序研究兴趣
-    sorted_interests = dict(sorted(research_interests.items(), key=lambda x: x[1], reverse=True)[:15])
+    # 取出现次数最多的研究兴趣（次数相同保持出现顺序）
+    sorted_interests = dict(interest_counter.most_common(15))
     
     return {
         "totalPapers": total_papers,
         "totalCitations": total_citations,
         "avgHIndex": avg_h_index,
-        "institutionDistribution": institution_distribution,
+        "institutionDistribution": dict(institution_counter),
         "researchInterests": sorted_interests
     }
 
@@ -665,7 +957,7 @@ def create_fallback_author(author_name, error_msg):
         "citationCount": 0,
         "hIndex": 0,
         "homepage": "",
-        "url": f"https://scholar.google.com/scholar?q=author:{author_name.replace(' ', '+')}",
+        "url": scholar_url(author_name),
         "interests": [],
         "recentPapers": [],
         "searchSuccess": False,
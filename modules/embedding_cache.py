@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+
+import numpy as np
+
+from modules.sqlite_cache import CACHE_DB
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MEMORY_SIZE = 8192  # 内存 LRU 最多保留的向量数
+SQLITE_MAX_PARAMS = 500  # 单条 IN 查询的参数上限（低于 SQLite 默认的 999）
+
+
+def embedding_key(model_name, text):
+    """
+    以模型名 + 文本内容的 SHA-256 作为缓存键
+    """
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    嵌入向量缓存：内存 LRU + SQLite 持久化，向量以 float16 字节存储
+    """
+
+    def __init__(self, table="embedding_cache", maxsize=EMBEDDING_MEMORY_SIZE, path=CACHE_DB):
+        self.table = table
+        self.maxsize = maxsize
+        self.path = path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """
+        批量读取，返回 {key: float16 向量}，未命中的键不出现在结果中
+        """
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if not missing:
+            return found
+
+        try:
+            with closing(self._connect()) as conn:
+                for start in range(0, len(missing), SQLITE_MAX_PARAMS):
+                    chunk = missing[start:start + SQLITE_MAX_PARAMS]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float16)
+                        found[key] = vector
+                        self._remember(key, vector)
+        except sqlite3.Error as e:
+            logger.warning(f"读取嵌入缓存失败 {self.table}: {e}")
+
+        return found
+
+    def set_many(self, items):
+        """
+        批量写入 {key: 向量}，统一转为 float16 存储
+        """
+        rows = []
+        for key, vector in items.items():
+            vector = np.ascontiguousarray(vector, dtype=np.float16)
+            self._remember(key, vector)
+            rows.append((key, vector.tobytes()))
+
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)", rows
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"写入嵌入缓存失败 {self.table}: {e}")
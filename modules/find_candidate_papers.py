@@ -1,65 +1,179 @@
+import os
+import re
 import requests
 import logging
+import threading
+import numpy as np
+import torch
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from heapq import nlargest
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from modules.embedding_cache import EmbeddingCache, embedding_key
 
 
 logger = logging.getLogger(__name__)
 
+# OpenAlex 连接池会话：同一主机的连续请求复用 TCP+TLS 连接；5xx/429 自动退避重试
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False,
+    ),
+))
+
 # 全局加载模型（避免重复加载）
 _embedding_model = None
+_embedding_model_name = None
+_MODEL_LOCK = threading.Lock()
+
+# 按内容哈希缓存嵌入向量，重复出现的候选论文无需再次前向计算
+_EMBEDDING_CACHE = EmbeddingCache()
+
+# 候选论文搜索只取轻量元数据；摘要（倒排索引）体积最大，只为初筛后的论文单独获取
+CANDIDATE_SELECT_FIELDS = 'id,doi,title,publication_year,cited_by_count,authorships,primary_location'
+ABSTRACT_SELECT_FIELDS = 'id,abstract_inverted_index'
+
+# 按标题初筛保留 top_k 的倍数，再补全摘要做最终排序
+SHORTLIST_FACTOR = 2
+
+# OpenAlex 单个 OR 过滤条件最多携带的 ID 数
+OPENALEX_MAX_IDS_PER_FILTER = 50
+
+# 关键词搜索、概念查询与概念搜索并发执行
+_SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=3, thread_name_prefix="candidate-search")
+
+# 嵌入模型：默认轻量模型，高质量模式下使用 SPECTER2
+FAST_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+HIGH_QUALITY_EMBEDDING_MODEL = 'allenai/specter2'
+
+# 关键词提取：学术停用词与单词模式
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
+    'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+    'could', 'should', 'may', 'might', 'must', 'shall', 'can', 'need',
+    'this', 'that', 'these', 'those', 'it', 'its', 'they', 'them', 'their',
+    'we', 'our', 'you', 'your', 'he', 'she', 'his', 'her', 'which', 'who',
+    'whom', 'what', 'where', 'when', 'why', 'how', 'all', 'each', 'every',
+    'both', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'not',
+    'only', 'same', 'so', 'than', 'too', 'very', 'just', 'also', 'now',
+    'paper', 'study', 'research', 'method', 'results', 'conclusion',
+    'introduction', 'abstract', 'figure', 'table', 'section', 'chapter',
+    'however', 'therefore', 'thus', 'hence', 'moreover', 'furthermore',
+    'although', 'though', 'while', 'whereas', 'because', 'since', 'unless',
+    'proposed', 'propose', 'show', 'shows', 'shown', 'based', 'using', 'used'
+})
+_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+
+# 批量编码的批大小
+ENCODE_BATCH_SIZE = 64
+
+# 编码时的最大 token 数：标题 + 500 字符摘要通常远小于该值，
+# 超长文本按 token 截断，避免个别长文本把整批填充到模型上限（SPECTER2 为 512）
+ENCODE_MAX_SEQ_LENGTH = 256
 
 def get_embedding_model():
-    """懒加载嵌入模型"""
-    global _embedding_model
-    if _embedding_model is None:
-        # 使用学术论文专用模型，或者通用模型
-        try:
-            _embedding_model = SentenceTransformer('allenai/specter2')
-            logger.info("加载 SPECTER2 模型成功")
-        except:
-            # 备选：更轻量的模型
-            _embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("加载 MiniLM 模型成功")
+    """
+    懒加载嵌入模型（模块导入时已在后台线程预热，首个请求若赶上下载中会等待其完成）
+    默认使用轻量的 MiniLM（CPU 上明显快于 SPECTER2）；
+    设置 PAPERLENS_HIGH_QUALITY=1 时改用学术论文专用的 SPECTER2
+    """
+    global _embedding_model, _embedding_model_name
+    if _embedding_model is not None:
+        return _embedding_model
+    
+    # 加锁保证模型只加载一次；预热线程正在加载时，这里会等待而不是重复下载
+    with _MODEL_LOCK:
+        if _embedding_model is None:
+            # 限制 PyTorch 线程数，避免与 Flask 工作线程争抢 CPU
+            torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+            
+            model, model_name = None, None
+            if os.environ.get('PAPERLENS_HIGH_QUALITY') == '1':
+                try:
+                    model = SentenceTransformer(HIGH_QUALITY_EMBEDDING_MODEL)
+                    model_name = HIGH_QUALITY_EMBEDDING_MODEL
+                    logger.info("加载 SPECTER2 模型成功")
+                except (OSError, ValueError, ImportError) as e:
+                    logger.warning(f"加载 SPECTER2 模型失败，改用 MiniLM: {e}")
+            
+            if model is None:
+                model = SentenceTransformer(FAST_EMBEDDING_MODEL)
+                model_name = FAST_EMBEDDING_MODEL
+                logger.info("加载 MiniLM 模型成功")
+            
+            model.max_seq_length = min(model.max_seq_length or ENCODE_MAX_SEQ_LENGTH, ENCODE_MAX_SEQ_LENGTH)
+            
+            # 先写模型名再发布模型，未加锁的读取方看到模型时名称一定已就绪
+            _embedding_model_name = model_name
+            _embedding_model = model
+    
     return _embedding_model
 
 
-def extract_paper_keywords(text, max_keywords=10):
+def prewarm_embedding_model():
     """
-    从论文文本中提取关键词用于初步搜索
+    后台预加载嵌入模型，避免首个推荐请求承担模型下载和加载的耗时
     """
-    import re
-    from collections import Counter
-    
-    # 学术停用词
-    stop_words = {
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-        'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
-        'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-        'could', 'should', 'may', 'might', 'must', 'shall', 'can', 'need',
-        'this', 'that', 'these', 'those', 'it', 'its', 'they', 'them', 'their',
-        'we', 'our', 'you', 'your', 'he', 'she', 'his', 'her', 'which', 'who',
-        'whom', 'what', 'where', 'when', 'why', 'how', 'all', 'each', 'every',
-        'both', 'few', 'more', 'most', 'other', 'some', 'such', 'no', 'not',
-        'only', 'same', 'so', 'than', 'too', 'very', 'just', 'also', 'now',
-        'paper', 'study', 'research', 'method', 'results', 'conclusion',
-        'introduction', 'abstract', 'figure', 'table', 'section', 'chapter',
-        'however', 'therefore', 'thus', 'hence', 'moreover', 'furthermore',
-        'although', 'though', 'while', 'whereas', 'because', 'since', 'unless',
-        'proposed', 'propose', 'show', 'shows', 'shown', 'based', 'using', 'used'
-    }
+    try:
+        get_embedding_model()
+    except Exception as e:
+        logger.warning(f"预加载嵌入模型失败，将在首次使用时重试: {e}")
+
+
+def encode_texts(texts):
+    """
+    批量编码文本，返回 L2 归一化后的 float32 矩阵
+    先查嵌入缓存，只对未命中的文本做一次前向计算
+    （SentenceTransformer 内部会按长度排序分批，减少填充）
+    """
+    model = get_embedding_model()
+    keys = [embedding_key(_embedding_model_name, text) for text in texts]
+    cached = _EMBEDDING_CACHE.get_many(keys)
     
-    # 提取单词
-    words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
+    # 同一批内重复的文本只编码一次
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
     
-    # 过滤停用词
-    filtered_words = [w for w in words if w not in stop_words]
+    if missing:
+        encoded = model.encode(
+            list(missing.values()),
+            batch_size=ENCODE_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        # 缓存以 float16 存储，新编码的向量同样经过 float16，保证命中与否结果一致
+        encoded = np.asarray(encoded, dtype=np.float16)
+        new_items = dict(zip(missing.keys(), encoded))
+        _EMBEDDING_CACHE.set_many(new_items)
+        cached.update(new_items)
     
-    # 统计词频
-    word_counts = Counter(filtered_words)
+    return np.stack([cached[key] for key in keys]).astype(np.float32)
+
+
+def extract_paper_keywords(text, max_keywords=10):
+    """
+    从论文文本中提取关键词用于初步搜索
+    """
+    # 提取单词、过滤停用词并统计词频，一次遍历完成，不生成中间列表
+    word_counts = Counter(
+        word for word in (m.group() for m in _WORD_RE.finditer(text.lower()))
+        if word not in _STOP_WORDS
+    )
     
-    # 提取最常见的关键词
-    keywords = [word for word, count in word_counts.most_common(max_keywords)]
+    # 提取最常见的关键词（直接按词频取前 N 个键，不生成 (词, 次数) 列表）
+    keywords = nlargest(max_keywords, word_counts, key=word_counts.get)
     
     return keywords
 
@@ -67,6 +181,7 @@ def extract_paper_keywords(text, max_keywords=10):
 def search_candidate_papers_openalex(query_text, keywords, max_candidates=50):
     """
     使用 OpenAlex 搜索候选论文
+    关键词搜索与概念查询互不依赖，并发发出；结果仍按“关键词 → 概念”的顺序合并去重
     """
     headers = {'User-Agent': 'PaperLens/1.0 (mailto:contact@example.com)'}
     all_papers = []
@@ -84,46 +199,29 @@ def search_candidate_papers_openalex(query_text, keywords, max_candidates=50):
             'per_page': 25,
             'sort': 'relevance_score:desc',
             'filter': 'type:article,has_abstract:true',
-            'select': 'id,doi,title,publication_year,cited_by_count,authorships,primary_location,abstract_inverted_index'
+            'select': CANDIDATE_SELECT_FIELDS
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=15)
+        search_future = _SEARCH_EXECUTOR.submit(_SESSION.get, url, params=params, headers=headers, timeout=15)
+        # 策略2：基于概念搜索补充（先获取相关概念）
+        concepts_future = _SEARCH_EXECUTOR.submit(get_concepts_for_query, search_query, headers)
         
-        if response.status_code == 200:
-            data = response.json()
-            for work in data.get('results', []):
-                paper_id = work.get('id', '')
-                if paper_id and paper_id not in seen_ids:
-                    seen_ids.add(paper_id)
-                    paper = parse_openalex_work(work)
-                    if paper and paper.get('abstract'):  # 只保留有摘要的
-                        all_papers.append(paper)
+        concept_future = None
+        concepts = concepts_future.result()
+        if concepts:
+            concept_filter = '|'.join([c.replace('https://openalex.org/', '') for c in concepts[:3]])
+            concept_params = {
+                'filter': f'concepts.id:{concept_filter},type:article,has_abstract:true',
+                'per_page': 25,
+                'sort': 'cited_by_count:desc',
+                'select': CANDIDATE_SELECT_FIELDS
+            }
+            concept_future = _SEARCH_EXECUTOR.submit(_SESSION.get, url, params=concept_params, headers=headers, timeout=15)
         
-        # 策略2：基于概念搜索补充
-        if len(all_papers) < max_candidates:
-            # 先获取相关概念
-            concepts = get_concepts_for_query(search_query, headers)
-            
-            if concepts:
-                concept_filter = '|'.join([c.replace('https://openalex.org/', '') for c in concepts[:3]])
-                params = {
-                    'filter': f'concepts.id:{concept_filter},type:article,has_abstract:true',
-                    'per_page': 25,
-                    'sort': 'cited_by_count:desc',
-                    'select': 'id,doi,title,publication_year,cited_by_count,authorships,primary_location,abstract_inverted_index'
-                }
-                
-                response = requests.get(url, params=params, headers=headers, timeout=15)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    for work in data.get('results', []):
-                        paper_id = work.get('id', '')
-                        if paper_id and paper_id not in seen_ids:
-                            seen_ids.add(paper_id)
-                            paper = parse_openalex_work(work)
-                            if paper and paper.get('abstract'):
-                                all_papers.append(paper)
+        collect_openalex_works(search_future.result(), seen_ids, all_papers)
+        
+        if concept_future is not None and len(all_papers) < max_candidates:
+            collect_openalex_works(concept_future.result(), seen_ids, all_papers)
         
         logger.info(f"OpenAlex 搜索到 {len(all_papers)} 篇候选论文")
         return all_papers[:max_candidates]
@@ -133,6 +231,24 @@ def search_candidate_papers_openalex(query_text, keywords, max_candidates=50):
         return []
 
 
+def collect_openalex_works(response, seen_ids, all_papers):
+    """
+    解析一次 OpenAlex 搜索响应，去重后追加到 all_papers
+    （搜索已带 has_abstract:true 过滤，摘要在初筛后由 attach_abstracts 补全）
+    """
+    if response.status_code != 200:
+        return
+    
+    data = response.json()
+    for work in data.get('results', []):
+        paper_id = work.get('id', '')
+        if paper_id and paper_id not in seen_ids:
+            seen_ids.add(paper_id)
+            paper = parse_openalex_work(work)
+            if paper:
+                all_papers.append(paper)
+
+
 def get_concepts_for_query(query, headers):
     """
     根据查询获取相关的 OpenAlex concepts
@@ -144,7 +260,7 @@ def get_concepts_for_query(query, headers):
             'per_page': 5
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = _SESSION.get(url, params=params, headers=headers, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -207,25 +323,115 @@ def reconstruct_abstract(inverted_index):
         return ''
     
     try:
-        # 创建位置到单词的映射
-        position_word = {}
+        # 一次遍历收集 (位置, 单词) 并记录最大位置，不再构建字典
+        items = []
+        max_pos = -1
         for word, positions in inverted_index.items():
             for pos in positions:
-                position_word[pos] = word
-        
-        # 按位置排序并拼接
-        if position_word:
-            max_pos = max(position_word.keys())
-            words = [position_word.get(i, '') for i in range(max_pos + 1)]
-            return ' '.join(words)
+                items.append((pos, word))
+                if pos > max_pos:
+                    max_pos = pos
         
-        return ''
+        # 按位置直接写入预分配列表后拼接
+        words = [''] * (max_pos + 1)
+        for pos, word in items:
+            words[pos] = word
+        return ' '.join(words)
         
     except Exception as e:
         logger.error(f"还原摘要失败: {e}")
         return ''
 
 
+def top_k_indices(scores, top_k):
+    """
+    返回分数最高的 top_k 个下标（降序，同分按原顺序），结果与稳定全排序后截断一致
+    先用 np.partition 在 O(N) 内找到第 k 大的分数作为阈值，只对入选的下标排序
+    """
+    neg_scores = -scores
+    if top_k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if top_k >= len(scores):
+        return np.argsort(neg_scores, kind='stable')
+    
+    threshold = np.partition(neg_scores, top_k - 1)[top_k - 1]
+    above = np.flatnonzero(neg_scores < threshold)
+    ties = np.flatnonzero(neg_scores == threshold)[:top_k - len(above)]
+    selected = np.concatenate([above, ties])
+    return selected[np.argsort(neg_scores[selected], kind='stable')]
+
+
+def shortlist_candidates(query_text, candidate_papers, top_k=10):
+    """
+    两阶段筛选的第一步：按标题与查询的语义相似度保留前 top_k * SHORTLIST_FACTOR 篇，
+    然后只为这些论文获取摘要（只保留有摘要的论文）
+    """
+    limit = top_k * SHORTLIST_FACTOR
+    shortlisted = candidate_papers
+    
+    if len(candidate_papers) > limit:
+        try:
+            titles = [paper.get('title') or '' for paper in candidate_papers]
+            embeddings = encode_texts([query_text] + titles)
+            title_similarities = embeddings[1:] @ embeddings[0]
+            
+            # 保持原有顺序，最终排序时同分论文的先后不受初筛影响
+            selected = np.sort(top_k_indices(title_similarities, limit))
+            shortlisted = [candidate_papers[i] for i in selected.tolist()]
+        except Exception as e:
+            logger.error(f"按标题初筛失败: {e}")
+            shortlisted = candidate_papers[:limit]
+    
+    return attach_abstracts(shortlisted)
+
+
+def attach_abstracts(papers):
+    """
+    按 OpenAlex ID 批量获取摘要并写回论文，返回有摘要的论文
+    获取失败时原样返回，仍可只按标题排序
+    """
+    if not papers:
+        return papers
+    
+    headers = {'User-Agent': 'PaperLens/1.0 (mailto:contact@example.com)'}
+    abstracts = {}
+    
+    try:
+        for start in range(0, len(papers), OPENALEX_MAX_IDS_PER_FILTER):
+            chunk = papers[start:start + OPENALEX_MAX_IDS_PER_FILTER]
+            id_filter = '|'.join(paper['id'].replace('https://openalex.org/', '') for paper in chunk)
+            params = {
+                'filter': f'openalex:{id_filter}',
+                'per_page': len(chunk),
+                'select': ABSTRACT_SELECT_FIELDS
+            }
+            
+            response = _SESSION.get("https://api.openalex.org/works", params=params, headers=headers, timeout=15)
+            if response.status_code != 200:
+                logger.error(f"获取候选论文摘要失败: {response.status_code}")
+                return papers
+            
+            results = response.json().get('results', [])
+            if len(results) < len(chunk):
+                logger.warning(f"批量获取摘要不完整: 请求 {len(chunk)} 篇，返回 {len(results)} 篇")
+            
+            for work in results:
+                abstracts[work.get('id', '')] = reconstruct_abstract(work.get('abstract_inverted_index'))
+        
+    except Exception as e:
+        logger.error(f"获取候选论文摘要失败: {e}")
+        return papers
+    
+    with_abstract = []
+    for paper in papers:
+        abstract = abstracts.get(paper['id'], '')
+        if abstract:  # 只保留有摘要的
+            paper['abstract'] = abstract
+            with_abstract.append(paper)
+    
+    return with_abstract
+
+
 def rank_papers_by_similarity(query_text, candidate_papers, top_k=10):
     """
     使用语义相似度对候选论文进行排序
@@ -234,12 +440,7 @@ def rank_papers_by_similarity(query_text, candidate_papers, top_k=10):
         return []
     
     try:
-        model = get_embedding_model()
-        
-        # 编码查询文本
-        query_embedding = model.encode(query_text, convert_to_numpy=True)
-        
-        # 编码候选论文（使用标题+摘要）
+        # 候选论文文本（使用标题+摘要）
         candidate_texts = []
         for paper in candidate_papers:
             text = paper.get('title', '')
@@ -248,37 +449,48 @@ def rank_papers_by_similarity(query_text, candidate_papers, top_k=10):
                 text += ' ' + abstract[:500]  # 限制摘要长度
             candidate_texts.append(text)
         
-        candidate_embeddings = model.encode(candidate_texts, convert_to_numpy=True)
+        # 查询与候选论文在同一次前向计算中编码
+        embeddings = encode_texts([query_text] + candidate_texts)
+        query_embedding, candidate_embeddings = embeddings[0], embeddings[1:]
         
-        # 计算余弦相似度
-        similarities = cosine_similarity([query_embedding], candidate_embeddings)[0]
+        # 向量已归一化，余弦相似度即点积
+        similarities = candidate_embeddings @ query_embedding
         
-        # 综合评分：相似度 + 引用数归一化
-        max_citations = max(p.get('citationCount', 0) for p in candidate_papers) or 1
+        # 综合评分：相似度 + 引用数归一化，整体按数组一次计算
+        citations = np.array([p.get('citationCount', 0) or 0 for p in candidate_papers], dtype=np.float64)
+        years = np.array([p.get('year', 2020) or 2020 for p in candidate_papers], dtype=np.float64)
         
-        scored_papers = []
-        for i, paper in enumerate(candidate_papers):
-            similarity_score = similarities[i]
-            citation_score = paper.get('citationCount', 0) / max_citations * 0.2  # 引用权重20%
-            
-            # 时间衰减：更近的论文略微加分
-            year = paper.get('year', 2020) or 2020
-            recency_score = max(0, (year - 2015) / 10) * 0.1  # 时间权重10%
-            
-            total_score = similarity_score * 0.7 + citation_score + recency_score
-            
-            scored_papers.append({
-                **paper,
-                'similarity_score': round(float(similarity_score), 4),
-                'total_score': round(float(total_score), 4)
-            })
+        max_citations = citations.max() or 1
+        citation_scores = citations / max_citations * 0.2  # 引用权重20%
         
-        # 按总分排序
-        scored_papers.sort(key=lambda x: x['total_score'], reverse=True)
+        # 时间衰减：更近的论文略微加分
+        recency_scores = np.maximum(0, (years - 2015) / 10) * 0.1  # 时间权重10%
         
-        return scored_papers[:top_k]
+        total_scores = (
+            similarities * 0.7
+            + citation_scores.astype(np.float32)
+            + recency_scores.astype(np.float32)
+        )
+        
+        # 按四舍五入后的总分取前 top_k（同分保持原顺序）
+        rounded_totals = [round(score, 4) for score in total_scores.tolist()]
+        order = top_k_indices(np.array(rounded_totals), top_k)
+        
+        # 直接在入选论文的字典上写入分数，不再为每篇论文复制一份新字典
+        ranked_papers = []
+        for i in order.tolist():
+            paper = candidate_papers[i]
+            paper['similarity_score'] = round(float(similarities[i]), 4)
+            paper['total_score'] = rounded_totals[i]
+            ranked_papers.append(paper)
+        
+        return ranked_papers
         
     except Exception as e:
         logger.error(f"相似度计算失败: {e}")
         # 降级：按引用数排序
-        return sorted(candidate_papers, key=lambda x: x.get('citationCount', 0), reverse=True)[:top_k]
\ No newline at end of file
+        return sorted(candidate_papers, key=lambda x: x.get('citationCount', 0), reverse=True)[:top_k]
+
+
+# 模块导入时即在后台预热模型
+threading.Thread(target=prewarm_embedding_model, name="embedding-prewarm", daemon=True).start()
@@ -1,30 +1,33 @@
 import re
 
+# 匹配各种 GitHub URL 格式，合并为一个交替模式，只需扫描全文一次（模块加载时编译）
+_GITHUB_URL_RE = re.compile(
+    r'https?://(?:'
+    # GitHub Gist 链接
+    r'gist\.github\.com/[a-zA-Z0-9_-]+/[a-zA-Z0-9]+'
+    # 标准 GitHub 仓库链接
+    r'|github\.com/[a-zA-Z0-9_-]+/[a-zA-Z0-9_.-]+'
+    # GitHub Pages 链接
+    r'|[a-zA-Z0-9_-]+\.github\.io/[a-zA-Z0-9_.-]*'
+    r')',
+    re.IGNORECASE,
+)
+_WHITESPACE_RE = re.compile(r'\s+')
+_TRAILING_PUNCT_RE = re.compile(r'[。，；：、\)\]\}\.]+$')
+
+
 def extract_github_urls(text):
     """
-    从论文文本中提取 GitHub 网址
+    从论文文本中提取 GitHub 网址（按在文中出现的顺序去重）
     """
-    github_urls = []
-    
-    # 匹配各种 GitHub URL 格式
-    patterns = [
-        # 标准 GitHub 仓库链接
-        r'https?://github\.com/[a-zA-Z0-9_-]+/[a-zA-Z0-9_.-]+',
-        # GitHub Gist 链接
-        r'https?://gist\.github\.com/[a-zA-Z0-9_-]+/[a-zA-Z0-9]+',
-        # GitHub Pages 链接
-        r'https?://[a-zA-Z0-9_-]+\.github\.io/[a-zA-Z0-9_.-]*',
-    ]
+    github_urls = {}
     
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for match in matches:
-            # 清理链接：移除换行符和多余空格
-            cleaned_url = re.sub(r'\s+', '', match)
-            # 移除末尾的标点符号
-            cleaned_url = re.sub(r'[。，；：、\)\]\}\.]+$', '', cleaned_url)
-            if cleaned_url and cleaned_url not in github_urls:
-                github_urls.append(cleaned_url)
+    for match in _GITHUB_URL_RE.finditer(text):
+        # 清理链接：移除换行符和多余空格
+        cleaned_url = _WHITESPACE_RE.sub('', match.group())
+        # 移除末尾的标点符号
+        cleaned_url = _TRAILING_PUNCT_RE.sub('', cleaned_url)
+        if cleaned_url:
+            github_urls[cleaned_url] = None
     
-    # 去重并返回
-    return list(set(github_urls))
\ No newline at end of file
+    return list(github_urls)
@@ -1,20 +1,73 @@
 import re
 
+# 模块加载时预编译逐行匹配使用的正则
+_BRACKET_REF_RE = re.compile(r'^\[\d+\]')
+_FIRST_NUMBERED_RE = re.compile(r'^1\.')
+_NUMBERED_RE = re.compile(r'^(\d+)\.')
+_REF_START_RE = re.compile(r'^(\[\d+\]|\d+\.|•|\-|\.\s*\d)')
+_URL_RE = re.compile(r'https?://[^\s]+')
+_COPYRIGHT_RE = re.compile(r'©\s*\d{4}')
+_YEAR_RE = re.compile(r'(19|20)\d{2}')
+_AUTHOR_RE = re.compile(r'[A-Z][a-z]+,')
+_JOURNAL_RE = re.compile(r'[A-Z][a-z]*\.\s*[A-Z]')
+
+# 页眉页脚关键词（只过滤明确的页眉页脚，不要过滤可能的内容）
+_STRICT_INDICATORS = (
+    'nature biomedical engineering',
+    'vol 5 | june 2021',
+    '613–623 | www.nature.com',
+    'articles nature',
+    'scientific reports',
+    'reporting summary',
+    'author contribution',
+    'acknowledgement',
+    'competing interest',
+    'data availability',
+    'correspondence',
+    'reprints',
+    'supplementary'
+)
+
+# 参考文献章节标题
+_REFERENCE_HEADERS = (
+    'references',
+    'reference',
+    'bibliography',
+    '参考文献',
+    '参考书目',
+)
+
+# 参考文献之后的新章节标题
+_SECTION_HEADERS = (
+    'acknowledg',
+    'author contribution',
+    'competing interest',
+    'data availability',
+    'supplementary',
+    'appendix'
+)
+
+# 常见的参考文献特征词
+_REF_INDICATORS = (
+    'et al.', 'vol.', 'pp.', 'journal', 'proc.', 'conf.',
+    'nature', 'science', 'cell', 'adv.', 'front.',
+    'acs', 'chem.', 'biol.', 'phys.', 'int.'
+)
+
 def extract_references(pdf_file):
     """
     正确识别方括号编号的参考文献
     """
     try:
-        lines = pdf_file.split('\n')
+        # 每行只 strip 一次，后续逐行判断与向前查看都直接复用
+        lines = [line.strip() for line in pdf_file.split('\n')]
         ref_lines = []
         in_references = False
         current_ref = ""
         empty_line_count = 0
         ref_section_ended = False
         
-        for i, line in enumerate(lines):
-            line_clean = line.strip()
-            
+        for i, line_clean in enumerate(lines):
             # 跳过页眉页脚和版权信息
             if is_header_footer_copyright(line_clean):
                 continue
@@ -26,12 +79,11 @@ def extract_references(pdf_file):
                     continue
                 
                 # 新增：如果没有明确标题，但检测到参考文献格式，也认为是参考文献章节
-                elif re.match(r'^\[\d+\]', line_clean) and len(line_clean) > 20:
+                elif _BRACKET_REF_RE.match(line_clean) and len(line_clean) > 20:
                     # 检查下8行内是否还有其他方括号开头的行
                     has_another_ref = False
                     for j in range(i+1, min(i+9, len(lines))):  # 检查下8行
-                        next_line_clean = lines[j].strip()
-                        if re.match(r'^\[\d+\]', next_line_clean):
+                        if _BRACKET_REF_RE.match(lines[j]):
                             has_another_ref = True
                             break
                     
@@ -42,29 +94,33 @@ def extract_references(pdf_file):
                         continue
 
                 # 新增：检测数字加点格式（如1. ）
-                elif re.match(r'^1\.', line_clean) and len(line_clean) > 20:
+                elif _FIRST_NUMBERED_RE.match(line_clean) and len(line_clean) > 20:
                     # 检查下50行内是否有按顺序的2. 3. ... 10.
                     has_sequential_numbering = False
                     expected_number = 2
                     max_number_to_check = 10
                     
                     for j in range(i+1, min(i+51, len(lines))):  # 检查下50行
-                        next_line_clean = lines[j].strip()
+                        next_line_clean = lines[j]
                         # 跳过空行
                         if not next_line_clean:
                             continue
                         
+                        number_match = _NUMBERED_RE.match(next_line_clean)
+                        if not number_match:
+                            continue
+                        
                         # 检查是否是当前期望的数字格式
-                        if re.match(r'^' + str(expected_number) + r'\.', next_line_clean):
+                        if number_match.group(1) == str(expected_number):
                             expected_number += 1
                             # 如果找到了10.，说明是顺序编号的参考文献
                             if expected_number > max_number_to_check:
                                 has_sequential_numbering = True
                                 break
                         # 如果不是期望的数字，重置检查（允许跳过某些编号）
-                        elif re.match(r'^\d+\.', next_line_clean):
+                        else:
                             # 如果是其他数字，重新开始检查顺序
-                            current_num = int(re.match(r'^(\d+)\.', next_line_clean).group(1))
+                            current_num = int(number_match.group(1))
                             if current_num == expected_number:
                                 expected_number += 1
                             elif current_num > expected_number:
@@ -95,7 +151,7 @@ def extract_references(pdf_file):
                     continue
                 
                 # 修复：改进正则表达式，匹配方括号格式
-                if re.match(r'^(\[\d+\]|\d+\.|•|\-|\.\s*\d)', line_clean):
+                if _REF_START_RE.match(line_clean):
                     if current_ref:
                         ref_lines.append(current_ref)
                     current_ref = line_clean
@@ -130,34 +186,17 @@ def is_header_footer_copyright(line):
         
     line_lower = line.lower()
     
-    # 减少过于严格的过滤条件
-    strict_indicators = [
-        'nature biomedical engineering',
-        'vol 5 | june 2021',
-        '613–623 | www.nature.com',
-        'articles nature',
-        'scientific reports',
-        'reporting summary',
-        'author contribution',
-        'acknowledgement',
-        'competing interest',
-        'data availability',
-        'correspondence',
-        'reprints',
-        'supplementary'
-    ]
-    
     # 只过滤明确的页眉页脚，不要过滤可能的内容
-    for indicator in strict_indicators:
+    for indicator in _STRICT_INDICATORS:
         if indicator in line_lower:
             return True
     
     # 检查明显的URL和版权信息
-    if re.search(r'https?://[^\s]+', line_lower) or 'doi.org' in line_lower:
+    if _URL_RE.search(line_lower) or 'doi.org' in line_lower:
         return True
     
     # 检查明显的版权信息
-    if re.search(r'©\s*\d{4}', line_lower) or 'copyright' in line_lower:
+    if _COPYRIGHT_RE.search(line_lower) or 'copyright' in line_lower:
         return True
     
     return False
@@ -166,46 +205,15 @@ def is_reference_section_header(line):
     """判断是否是参考文献章节标题 - 放宽条件"""
     line_lower = line.lower().strip()
     
-    # 参考文献标题的匹配
-    reference_headers = [
-        'references',
-        'reference',
-        'bibliography', 
-        '参考文献',
-        '参考书目',
-    ]
-    
-    # 精确匹配或开头匹配
-    if line_lower in reference_headers:
-        return True
-    
-    for header in reference_headers:
-        if line_lower.startswith(header):
-            return True
-    
-    return False
+    # 开头匹配（已包含精确匹配）
+    return line_lower.startswith(_REFERENCE_HEADERS)
 
 def is_end_of_references_section(line, line_num, all_lines):
     """判断是否是参考文献章节的结束 - 更保守"""
     line_clean = line.strip().lower()
     
-    # 只有在明确的新章节标题时才结束
-    section_headers = [
-        'acknowledg',
-        'author contribution',
-        'competing interest', 
-        'data availability',
-        'supplementary',
-        'appendix'
-    ]
-    
-    # 必须是独立的短行才认为是章节标题
-    if len(line_clean) < 50:
-        for header in section_headers:
-            if line_clean.startswith(header):
-                return True
-    
-    return False
+    # 只有在明确的新章节标题时才结束，且必须是独立的短行才认为是章节标题
+    return len(line_clean) < 50 and line_clean.startswith(_SECTION_HEADERS)
 
 def filter_real_references(ref_lines):
     """最终过滤 - 大幅放宽条件"""
@@ -225,27 +233,22 @@ def filter_real_references(ref_lines):
     return real_references
 
 def has_basic_reference_features(text):
-    """检查是否具有参考文献的基本特征"""
+    """检查是否具有参考文献的基本特征（满足任意一个主要特征即可，按开销从低到高短路判断）"""
+    if len(text) <= 20:
+        return False
+    
     # 包含年份（4位数字）
-    has_year = re.search(r'(19|20)\d{2}', text)
+    if _YEAR_RE.search(text):
+        return True
     
     # 包含常见的参考文献特征
-    ref_indicators = [
-        'et al.', 'vol.', 'pp.', 'journal', 'proc.', 'conf.',
-        'nature', 'science', 'cell', 'adv.', 'front.', 
-        'acs', 'chem.', 'biol.', 'phys.', 'proc.', 'int.'
-    ]
-    
-    has_ref_features = any(indicator in text.lower() for indicator in ref_indicators)
-    
-    # 包含作者模式（大写字母开头+逗号）
-    has_author_pattern = re.search(r'[A-Z][a-z]+,', text)
-    
-    # 包含期刊缩写特征（大写字母+点）
-    has_journal_pattern = re.search(r'[A-Z][a-z]*\.\s*[A-Z]', text)
+    text_lower = text.lower()
+    for indicator in _REF_INDICATORS:
+        if indicator in text_lower:
+            return True
     
-    # 满足任意一个主要特征即可
-    return (has_year or has_ref_features or has_author_pattern or has_journal_pattern) and len(text) > 20
+    # 包含作者模式（大写字母开头+逗号）或期刊缩写特征（大写字母+点）
+    return bool(_AUTHOR_RE.search(text) or _JOURNAL_RE.search(text))
 
 def get_fallback_citations():
     """
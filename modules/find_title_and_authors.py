@@ -1,10 +1,22 @@
-import re
+import json
+import hashlib
 import logging
 import requests 
+from requests.adapters import HTTPAdapter
+from modules.sqlite_cache import SQLiteCache
 
 
 logger = logging.getLogger(__name__)
 
+# DeepSeek 连接池会话，连续请求复用 TCP+TLS 连接
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=10))
+
+# 以论文开头文本的哈希为键缓存提取结果，相同的论文开头无需再次调用 AI
+_TITLE_AUTHORS_CACHE = SQLiteCache("title_authors_cache")
+
+_JSON_DECODER = json.JSONDecoder()
+
 
 def extract_title_authors_with_ai(text, api_key):
     """
@@ -12,12 +24,19 @@ def extract_title_authors_with_ai(text, api_key):
     """
     if not api_key:
         return "111", ["1","2","3"]
+    
+    head = text[:2000]
+    cache_key = hashlib.sha1(head.encode('utf-8')).hexdigest()
+    cached = _TITLE_AUTHORS_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info(f"命中标题作者缓存: {cache_key}")
+        return cached[0], cached[1]
         
     try:
         prompt = f"""请从以下学术论文的开头内容中提取标题和作者信息。
 
 论文内容：
-{text[:2000]} 
+{head} 
 
 请严格按照以下JSON格式输出:
 {{
@@ -46,20 +65,19 @@ def extract_title_authors_with_ai(text, api_key):
             "temperature": 0.1
         }
 
-        response = requests.post("https://api.deepseek.com/v1/chat/completions", 
-                               headers=headers, json=payload, timeout=30)
+        response = _SESSION.post("https://api.deepseek.com/v1/chat/completions", 
+                                 headers=headers, json=payload, timeout=30)
         
         if response.status_code == 200:
             result = response.json()
             content = result['choices'][0]['message']['content']
             logger.info(f"AI响应内容: {content}")
             
-            # 提取JSON部分
-            import json
+            # 提取JSON部分：从第一个 { 开始解码一个完整对象，忽略前后的 markdown 等内容
             try:
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    data = json.loads(json_match.group())
+                start = content.find('{')
+                if start >= 0:
+                    data, _ = _JSON_DECODER.raw_decode(content, start)
                     title = data.get('title', '').strip()
                     authors = data.get('authors', [])
                     
@@ -70,6 +88,7 @@ def extract_title_authors_with_ai(text, api_key):
                             if author and isinstance(author, str) and len(author.strip()) > 1:
                                 cleaned_authors.append(author.strip())
                         
+                        _TITLE_AUTHORS_CACHE.set(cache_key, [title, cleaned_authors])
                         return title, cleaned_authors
             except Exception as e:
                 logger.warning(f"AI提取JSON解析失败: {e}")
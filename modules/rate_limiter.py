@@ -0,0 +1,38 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    线程安全的令牌桶限流器，用于控制对同一上游服务的请求速率
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate  # 每秒补充的令牌数
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        阻塞直到取得一个令牌
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+# OpenAlex 按客户端限制每秒 10 次请求，各模块共用同一个限速器，尽量不触发 429
+OPENALEX_MAX_RPS = 8
+OPENALEX_LIMITER = RateLimiter(rate=OPENALEX_MAX_RPS)
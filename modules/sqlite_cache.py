@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "cache"  # 缓存存储目录
+CACHE_DB = os.path.join(CACHE_DIR, "paperlens.sqlite3")
+
+
+class SQLiteCache:
+    """
+    基于 SQLite 的持久化键值缓存，值以 JSON 存储，可设置过期时间
+    """
+
+    def __init__(self, table, ttl=None, path=CACHE_DB):
+        self.table = table
+        self.ttl = ttl  # 过期时间（秒），None 表示永不过期
+        self.path = path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, ts INTEGER NOT NULL)"
+            )
+
+    def _connect(self):
+        # 每次操作使用独立连接，保证多线程下可用
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        """
+        读取缓存，未命中或已过期时返回 None
+        """
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    f"SELECT value, ts FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"读取缓存失败 {self.table}: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        value, ts = row
+        if self.ttl is not None and time.time() - ts > self.ttl:
+            return None
+
+        return json.loads(value)
+
+    def set(self, key, value):
+        """
+        写入缓存（已存在则覆盖）
+        """
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, ts) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), int(time.time())),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"写入缓存失败 {self.table}: {e}")
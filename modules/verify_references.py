@@ -1,19 +1,75 @@
 import re
+import hashlib
 import logging
+import threading
+import time
 import requests
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from modules.rate_limiter import OPENALEX_LIMITER
+from modules.sqlite_cache import SQLiteCache
 
 logger = logging.getLogger(__name__)
 
-def extract_search_query_with_ai(ref_text, api_key, api_base):
-    """
-    使用DeepSeek API从引用文本中智能提取搜索查询
-    """
-    try:
-        # 构建提示词，让AI提取最合适的搜索关键词
-        prompt = f"""
+# DeepSeek / OpenAlex 共用的连接池会话，逐条验证引用时复用 TCP+TLS 连接；
+# GET 遇到 5xx/429 自动退避重试（POST 默认不重试）
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False,
+    ),
+)
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.mount('http://', _ADAPTER)
+_SESSION.headers.update({
+    'User-Agent': 'PaperLens-Academic-Tool/1.0 (mailto:your-email@example.com)',
+})
+
+# 重复验证同一引用时跳过 DeepSeek 调用与 OpenAlex 搜索，缓存 7 天
+VERIFY_CACHE_TTL = 7 * 24 * 3600
+_AI_QUERY_CACHE = SQLiteCache("ai_search_query_cache", ttl=VERIFY_CACHE_TTL)
+_OPENALEX_SEARCH_CACHE = SQLiteCache("openalex_search_cache", ttl=VERIFY_CACHE_TTL)
+
+# 进程内去重表：同一会话里重复出现的引用/查询词直接复用首次结果，连 SQLite 也不再读；
+# 条目与 SQLite 缓存同样 7 天过期，长时间运行的服务不会一直返回旧结果
+DEDUP_MAX_ENTRIES = 10000
+DEDUP_TTL = VERIFY_CACHE_TTL
+_DEDUP = OrderedDict()
+_DEDUP_LOCK = threading.Lock()
+
+# 匹配度各项权重：标题关键词 + 作者姓氏 + 年份
+TITLE_WEIGHT = 0.5
+AUTHOR_WEIGHT = 0.3
+YEAR_WEIGHT = 0.2
+
+# 搜索结果缓存格式版本，结果字段变化时递增使旧缓存失效
+SEARCH_CACHE_VERSION = 2
+
+# 模块加载时预编译各函数使用的正则
+_STRIP_QUOTES_RE = re.compile(r'^["\']|["\']$')
+_QUOTED_RE = re.compile(r'["「]([^"」]+)["」]')
+_TITLE_RE = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){2,})\b')
+_AUTHOR_YEAR_RE = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*(?:\s+et al\.)?)[,\s]+(\d{4})')
+_TRIGRAM_RE = re.compile(r'\b([A-Za-z]+\s+[A-Za-z]+\s+[A-Za-z]+)\b')
+_WORD4_RE = re.compile(r'\b[a-z]{4,}\b')
+# DOI 止于空白、结尾的句末标点或分隔符；<> 用于 Wiley 的 SICI 式 DOI
+_DOI_RE = re.compile(r'10\.\d{4,9}/[-._;()/:<>A-Z0-9]+?(?=[.,;:]?(?:\s|$)|[,，。；、\]"\'])', re.IGNORECASE)
+
+# 短于该长度的引用信息有限，直接用规则提取，不调用 AI
+MIN_AI_REFERENCE_LENGTH = 40
+
+# DeepSeek 提示词：每条引用只替换引用文本，其余部分逐字节不变以便命中服务端前缀缓存
+_SYSTEM_PROMPT = "你是一个学术助手，专门从引用文本中提取论文搜索关键词。请直接返回最相关的搜索词，不要解释。"
+_USER_PROMPT_TMPL = """
         请从以下学术引用文本中提取最适合用于论文搜索的关键信息。只需要返回最相关的论文标题或核心关键词，不要解释。
 
-        引用文本："{ref_text}"
+        引用文本："{ref}"
 
         请提取：
         1. 论文标题（最重要的搜索关键词）
@@ -21,59 +77,139 @@ def extract_search_query_with_ai(ref_text, api_key, api_base):
         
         只需返回提取的内容，不要额外说明。
         """
+# 期望的回答只是一条标题或几个关键词
+AI_QUERY_MAX_TOKENS = 48
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
+def dedup_get(key):
+    """
+    读取进程内去重表，未命中或已过期时返回 None（过期条目顺带删除）
+    """
+    with _DEDUP_LOCK:
+        entry = _DEDUP.get(key)
+        if entry is None:
+            return None
         
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del _DEDUP[key]
+            return None
+        
+        _DEDUP.move_to_end(key)
+        return value
+
+
+def dedup_set(key, value):
+    """
+    写入进程内去重表，DEDUP_TTL 秒后过期，超过上限时淘汰最久未用的条目
+    """
+    with _DEDUP_LOCK:
+        _DEDUP[key] = (time.monotonic() + DEDUP_TTL, value)
+        _DEDUP.move_to_end(key)
+        while len(_DEDUP) > DEDUP_MAX_ENTRIES:
+            _DEDUP.popitem(last=False)
+
+
+def extract_search_query_with_ai(ref_text, api_key, api_base):
+    """
+    使用DeepSeek API从引用文本中智能提取搜索查询
+    """
+    # 结果只取决于引用文本和所用服务，不以 API Key 作为缓存键
+    cache_key = hashlib.sha256(f"{api_base}\0{ref_text}".encode('utf-8')).hexdigest()
+    if api_key:
+        cached = _AI_QUERY_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("命中AI搜索词缓存: %s", cached)
+            return cached
+    
+    try:
         payload = {
             "model": "deepseek-chat",
             "messages": [
-                {
-                    "role": "system", 
-                    "content": "你是一个学术助手，专门从引用文本中提取论文搜索关键词。请直接返回最相关的搜索词，不要解释。"
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": _USER_PROMPT_TMPL.format(ref=ref_text)}
             ],
-            "max_tokens": 100,
-            "temperature": 0.1
+            "max_tokens": AI_QUERY_MAX_TOKENS,
+            "temperature": 0.1,
+            "stop": ["\n\n"]
         }
 
-        response = requests.post(f"{api_base}/chat/completions", headers=headers, json=payload, timeout=30)
+        # Content-Type 由 json= 自动设置；API Key 随调用传入，不放到与 OpenAlex 共用的会话上
+        headers = {"Authorization": f"Bearer {api_key}"}
+        response = _SESSION.post(f"{api_base}/chat/completions", headers=headers, json=payload, timeout=30)
         
         if response.status_code == 200:
             result = response.json()
             search_query = result['choices'][0]['message']['content'].strip()
             
             # 清理AI返回的内容，移除可能的引号等
-            search_query = re.sub(r'^["\']|["\']$', '', search_query)
+            search_query = _STRIP_QUOTES_RE.sub('', search_query)
             
-            logger.info(f"AI提取的搜索词: {search_query}")
+            logger.info("AI提取的搜索词: %s", search_query)
+            _AI_QUERY_CACHE.set(cache_key, search_query)
             return search_query
         else:
-            logger.error(f"DeepSeek API错误: {response.status_code}")
+            logger.error("DeepSeek API错误: %s", response.status_code)
             return None
             
     except Exception as e:
-        logger.error(f"AI提取搜索词错误: {str(e)}")
+        logger.error("AI提取搜索词错误: %s", e)
         return None
 
 def smart_extract_search_query(ref_text, api_key, api_base):
     """
     智能提取搜索查询：优先使用AI，失败时使用规则备选
+    过短的引用只用规则提取；返回 (查询词, 是否由 AI 提取)
     """
+    if len(ref_text) < MIN_AI_REFERENCE_LENGTH:
+        return rule_based_fallback(ref_text), False
+    
+    # 同一引用再次出现时复用首次 AI 提取的结果（规则备选结果不记录，换用有效 Key 时仍会调用 AI）
+    dedup_key = b'q' + hashlib.blake2b(f"{api_base}\0{ref_text}".encode('utf-8'), digest_size=16).digest()
+    ai_query = dedup_get(dedup_key) if api_key else None
+    if ai_query is not None:
+        return ai_query, True
+    
     # 首先尝试AI提取
     ai_query = extract_search_query_with_ai(ref_text, api_key, api_base)
     
     if ai_query and len(ai_query) > 10:  # 确保查询有足够内容
-        return ai_query
+        dedup_set(dedup_key, ai_query)
+        return ai_query, True
     
     # AI提取失败时使用规则备选
-    return rule_based_fallback(ref_text)
+    return rule_based_fallback(ref_text), False
+
+def search_reference(ref_text, api_key, api_base, max_results=3):
+    """
+    为引用搜索候选论文，返回 (查询词, 是否由 AI 提取, 论文列表)
+    引用中带 DOI 时先按 DOI 精确查询，不调用 AI；OpenAlex 未收录该 DOI
+    或 DOI 识别有误而没有结果时，再退回标题/作者检索
+    """
+    doi = extract_doi(ref_text)
+    if doi:
+        papers = search_openalex(doi, max_results=max_results)
+        if papers:
+            return doi, False, papers
+        logger.info("按 DOI 未找到论文，改用标题/作者检索: %s", doi)
+    
+    search_query, ai_extraction_used = smart_extract_search_query(ref_text, api_key, api_base)
+    return search_query, ai_extraction_used, search_openalex(search_query, max_results=max_results)
+
+def extract_doi(text):
+    """
+    提取文本中的 DOI（去掉句末标点），没有时返回 None
+    结尾的右括号只在括号不配对时才视为包裹 DOI 的标点去掉，
+    如 10.1016/S0140-6736(20)30183-5 或以 ) 结尾的 SICI 式 DOI 保持完整
+    """
+    match = _DOI_RE.search(text)
+    if not match:
+        return None
+    
+    doi = match.group(0).rstrip('.;:')
+    while doi.endswith(')') and doi.count(')') > doi.count('('):
+        doi = doi[:-1].rstrip('.;:')
+    return doi
+
 
 def rule_based_fallback(ref_text):
     """
@@ -81,15 +217,14 @@ def rule_based_fallback(ref_text):
     """
     try:
         # 方法1: 提取引号内的内容（通常是标题）
-        quoted_content = re.findall(r'["「]([^"」]+)["」]', ref_text)
+        quoted_content = _QUOTED_RE.findall(ref_text)
         if quoted_content:
             for content in quoted_content:
                 if len(content) > 15:  # 确保是合理的标题长度
                     return content
         
         # 方法2: 提取明显的论文标题特征（首字母大写的连续单词）
-        title_pattern = r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){2,})\b'
-        title_matches = re.findall(title_pattern, ref_text)
+        title_matches = _TITLE_RE.findall(ref_text)
         if title_matches:
             # 选择最长的匹配作为标题
             longest_title = max(title_matches, key=len)
@@ -97,7 +232,7 @@ def rule_based_fallback(ref_text):
                 return longest_title
         
         # 方法3: 提取作者+年份
-        author_year_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*(?:\s+et al\.)?)[,\s]+(\d{4})', ref_text)
+        author_year_match = _AUTHOR_YEAR_RE.search(ref_text)
         if author_year_match:
             authors = author_year_match.group(1)
             year = author_year_match.group(2)
@@ -106,7 +241,7 @@ def rule_based_fallback(ref_text):
         # 方法4: 提取关键词短语
         # 寻找包含重要学术词汇的短语
         academic_indicators = ['learning', 'network', 'model', 'algorithm', 'system', 'analysis', 'detection']
-        words = re.findall(r'\b([A-Za-z]+\s+[A-Za-z]+\s+[A-Za-z]+)\b', ref_text)
+        words = _TRIGRAM_RE.findall(ref_text)
         for phrase in words:
             phrase_lower = phrase.lower()
             if any(indicator in phrase_lower for indicator in academic_indicators):
@@ -117,48 +252,91 @@ def rule_based_fallback(ref_text):
         return ref_text[:60].replace('\n', ' ').strip()
         
     except Exception as e:
-        logger.error(f"规则备选方法错误: {str(e)}")
+        logger.error("规则备选方法错误: %s", e)
         return ref_text[:50]
 
 def search_openalex(query, max_results=3):
     """
     使用提取的查询词搜索OpenAlex
     """
+    cache_key = f"v{SEARCH_CACHE_VERSION}:{max_results}:{query}"
+    # 调用方会修改返回的论文字典（补 url、abstract），去重表里只存原始结果，每次返回浅拷贝
+    papers = dedup_get(cache_key)
+    if papers is None:
+        papers = _OPENALEX_SEARCH_CACHE.get(cache_key)
+        if papers is not None:
+            dedup_set(cache_key, papers)
+    if papers is not None:
+        return [dict(paper) for paper in papers]
+    
     try:
         url = "https://api.openalex.org/works"
         params = {
-            'search': query,
             'per_page': max_results,
-            'select': 'id,doi,title,authorships,publication_year,primary_location,cited_by_count,abstract_inverted_index,biblio'
+            # 匹配只用到标题、作者和年份；体积最大的摘要只为最终匹配的论文单独获取
+            'select': 'id,doi,title,authorships,publication_year,primary_location,cited_by_count,biblio'
         }
         
-        headers = {
-            'User-Agent': 'PaperLens-Academic-Tool/1.0 (mailto:your-email@example.com)',
-            'Accept': 'application/json'
-        }
+        # 查询词本身是 DOI 时按 DOI 精确过滤，全文搜索无法命中 DOI
+        if _DOI_RE.fullmatch(query):
+            params['filter'] = f'doi:{query}'
+        else:
+            params['search'] = query
         
-        response = requests.get(url, params=params, headers=headers, timeout=15)
+        # 先经共用限速器取令牌，避免超过 OpenAlex 的每秒请求上限
+        OPENALEX_LIMITER.acquire()
+        response = _SESSION.get(url, params=params, headers={'Accept': 'application/json'}, timeout=15)
         
         if response.status_code == 200:
             result = response.json()
             # 转换OpenAlex格式为统一格式
             papers = []
             for work in result.get('results', []):
-                paper = convert_openalex_to_standard(work)
+                paper = convert_openalex_to_standard(work, include_abstract=False)
                 papers.append(paper)
-            return papers
+            _OPENALEX_SEARCH_CACHE.set(cache_key, papers)
+            dedup_set(cache_key, papers)
+            return [dict(paper) for paper in papers]
         else:
-            logger.error(f"OpenAlex搜索失败: {response.status_code}")
+            logger.error("OpenAlex搜索失败: %s", response.status_code)
             return []
             
     except Exception as e:
-        logger.error(f"搜索OpenAlex错误: {str(e)}")
+        logger.error("搜索OpenAlex错误: %s", e)
         return []
 
 
-def convert_openalex_to_standard(work):
+def fetch_paper_abstract(paper_id):
+    """
+    按 OpenAlex ID 获取单篇论文的摘要，失败时返回空字符串
+    """
+    if not paper_id:
+        return ''
+    
+    try:
+        OPENALEX_LIMITER.acquire()
+        response = _SESSION.get(
+            f"https://api.openalex.org/works/{paper_id}",
+            params={'select': 'abstract_inverted_index'},
+            headers={'Accept': 'application/json'},
+            timeout=15
+        )
+        
+        if response.status_code == 200:
+            return reconstruct_abstract(response.json().get('abstract_inverted_index'))
+        
+        logger.error("获取论文摘要失败: %s", response.status_code)
+        return ''
+        
+    except Exception as e:
+        logger.error("获取论文摘要错误: %s", e)
+        return ''
+
+
+def convert_openalex_to_standard(work, include_abstract=False):
     """
     将OpenAlex返回的数据格式转换为标准格式
+    摘要只在 include_abstract=True 时还原，搜索候选默认不还原，最终匹配的论文另行获取
     """
     # 提取作者信息
     authors = []
@@ -190,7 +368,7 @@ def convert_openalex_to_standard(work):
             venue = source.get('display_name', '')
     
     # 还原abstract（OpenAlex使用倒排索引存储）
-    abstract = reconstruct_abstract(work.get('abstract_inverted_index'))
+    abstract = reconstruct_abstract(work.get('abstract_inverted_index')) if include_abstract else ''
     
     # 提取paperId（从OpenAlex ID中提取）
     openalex_id = work.get('id', '')
@@ -218,30 +396,60 @@ def reconstruct_abstract(inverted_index):
         return ''
     
     try:
-        # 创建位置到词的映射
-        position_word_map = {}
+        # 一次遍历收集 (位置, 词) 并记录最大位置，不再构建字典
+        items = []
+        max_pos = -1
         for word, positions in inverted_index.items():
             for pos in positions:
-                position_word_map[pos] = word
+                items.append((pos, word))
+                if pos > max_pos:
+                    max_pos = pos
         
-        # 按位置排序并重建文本
-        if position_word_map:
-            max_pos = max(position_word_map.keys())
-            words = [position_word_map.get(i, '') for i in range(max_pos + 1)]
-            return ' '.join(words)
-        return ''
+        # 按位置直接写入预分配列表后重建文本
+        words = [''] * (max_pos + 1)
+        for pos, word in items:
+            words[pos] = word
+        return ' '.join(words)
     except Exception as e:
-        logger.error(f"重建摘要错误: {str(e)}")
+        logger.error("重建摘要错误: %s", e)
         return ''
 
 
-def calculate_ai_enhanced_match_score(ref_text, paper):
+def title_word_set(text):
+    """
+    提取 4 字母以上的单词并做简单的复数归一（studies→study，networks→network），
+    使标题与引用中单复数不同的词也能匹配；连字符词已被正则拆成独立单词
+    """
+    words = set()
+    for word in _WORD4_RE.findall(text):
+        if word.endswith('ies'):
+            word = word[:-3] + 'y'
+        elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+def prepare_reference_context(ref_text):
+    """
+    预先计算引用文本一侧的匹配特征（小写文本与 4 字母以上单词集合），
+    与多篇候选论文比较时只需计算一次
+    """
+    ref_text_lower = ref_text.lower()
+    return {
+        'text': ref_text,
+        'lower': ref_text_lower,
+        'words': title_word_set(ref_text_lower),
+    }
+
+
+def calculate_ai_enhanced_match_score(ref_text, paper, ref_context=None):
     """
     使用AI增强的匹配度计算
     """
     try:
         # 基础匹配分数
-        base_score = calculate_basic_match_score(ref_text, paper)
+        base_score = calculate_basic_match_score(ref_text, paper, ref_context)
         
         # 如果基础分数足够高，直接返回
         if base_score > 0.7:
@@ -253,59 +461,82 @@ def calculate_ai_enhanced_match_score(ref_text, paper):
         return base_score
         
     except Exception as e:
-        logger.error(f"计算匹配度错误: {str(e)}")
+        logger.error("计算匹配度错误: %s", e)
         return 0
 
 
-def calculate_basic_match_score(ref_text, paper):
+def title_match_component(paper, ref_context):
     """
-    基础匹配度计算（基于规则）
+    标题关键词匹配得分（最高 TITLE_WEIGHT）
     """
-    score = 0
     paper_title = paper.get('title', '').lower()
-    paper_authors = ' '.join([a.get('name', '').lower() for a in paper.get('authors', [])])
-    paper_year = str(paper.get('year', ''))
+    if not paper_title:
+        return 0
     
-    ref_text_lower = ref_text.lower()
+    title_words = title_word_set(paper_title)
+    if not title_words:
+        return 0
     
-    # 1. 标题关键词匹配
-    if paper_title:
-        title_words = set(re.findall(r'\b[a-z]{4,}\b', paper_title))
-        ref_words = set(re.findall(r'\b[a-z]{4,}\b', ref_text_lower))
-        
-        common_words = title_words.intersection(ref_words)
-        if title_words:
-            title_score = len(common_words) / len(title_words)
-            score += title_score * 0.5  # 提高标题权重
+    common_words = title_words.intersection(ref_context['words'])
+    title_score = len(common_words) / len(title_words)
+    return title_score * TITLE_WEIGHT
+
+
+def author_match_component(paper, ref_context):
+    """
+    前两位作者姓氏匹配得分（最高 AUTHOR_WEIGHT）
+    """
+    # 只对前两位作者的姓氏各小写一次；没有可用姓名时下方直接返回 0
+    author_last_names = []
+    for author in paper.get('authors', [])[:2]:
+        name = author.get('name', '')
+        if name:
+            # 只从右侧切一次取姓氏，不拆分整个姓名
+            last_name = name.rsplit(None, 1)[-1].lower()
+            author_last_names.append(last_name)
     
-    # 2. 作者匹配
-    if paper_authors:
-        author_last_names = []
-        for author in paper.get('authors', [])[:2]:
-            name = author.get('name', '')
-            if name:
-                last_name = name.split()[-1].lower()
-                author_last_names.append(last_name)
-        
-        author_match_count = 0
-        for last_name in author_last_names:
-            if last_name in ref_text_lower:
-                author_match_count += 1
-        
-        if author_last_names:
-            author_score = author_match_count / len(author_last_names)
-            score += author_score * 0.3
+    if not author_last_names:
+        return 0
     
-    # 3. 年份匹配
-    if paper_year and paper_year in ref_text:
-        score += 0.2
+    ref_text_lower = ref_context['lower']
+    author_match_count = 0
+    for last_name in author_last_names:
+        if last_name in ref_text_lower:
+            author_match_count += 1
     
-    return min(score, 1.0)
+    author_score = author_match_count / len(author_last_names)
+    return author_score * AUTHOR_WEIGHT
+
+
+def year_match_component(paper, ref_context):
+    """
+    年份匹配得分（YEAR_WEIGHT 或 0）
+    """
+    paper_year = str(paper.get('year', ''))
+    if paper_year and paper_year in ref_context['text']:
+        return YEAR_WEIGHT
+    return 0
+
+
+def calculate_basic_match_score(ref_text, paper, ref_context=None):
+    """
+    基础匹配度计算（基于规则）：标题关键词 + 作者 + 年份
+    ref_context 为 prepare_reference_context 的结果，未提供时现场计算
+    """
+    if ref_context is None:
+        ref_context = prepare_reference_context(ref_text)
+    
+    score = title_match_component(paper, ref_context)
+    score += author_match_component(paper, ref_context)
+    score += year_match_component(paper, ref_context)
+    
+    return score if score < 1.0 else 1.0
 
 
 def find_best_match(ref_text, papers):
     """
     在搜索结果中找到最佳匹配
+    逐项累加得分，剩余项取满分也无法超过当前最佳时提前跳过该论文
     """
     if not papers:
         return {'paper': None, 'score': 0}
@@ -313,11 +544,33 @@ def find_best_match(ref_text, papers):
     best_score = 0
     best_paper = papers[0]
     
+    # 引用文本一侧的特征对所有候选论文相同，只计算一次
+    ref_context = prepare_reference_context(ref_text)
+    
     for paper in papers:
-        score = calculate_ai_enhanced_match_score(ref_text, paper)
+        try:
+            # best_score 在循环内始终小于 1.0（满分即退出），上界比较无需先截断到 1.0
+            title_part = title_match_component(paper, ref_context)
+            if title_part + AUTHOR_WEIGHT + YEAR_WEIGHT <= best_score:
+                continue
+            
+            author_part = author_match_component(paper, ref_context)
+            if title_part + author_part + YEAR_WEIGHT <= best_score:
+                continue
+            
+            score = title_part + author_part + year_match_component(paper, ref_context)
+            score = score if score < 1.0 else 1.0
+        except Exception as e:
+            logger.error("计算匹配度错误: %s", e)
+            continue
+        
         if score > best_score:
             best_score = score
             best_paper = paper
+            
+            # 已是满分，后面的论文不可能更高
+            if best_score >= 1.0:
+                break
     
     # 确保论文有可访问的URL
     if best_paper and not best_paper.get('url'):
@@ -0,0 +1,73 @@
+import unittest
+from unittest import mock
+
+from modules import verify_references
+
+
+class ExtractDoiTest(unittest.TestCase):
+    """
+    DOI 提取止于空白、句末标点或分隔符，DOI 自身的括号保持完整
+    """
+
+    def test_stops_at_whitespace_and_trailing_period(self):
+        cases = {
+            "Nature 521, 436. doi:10.1038/nature14539. Next ref": "10.1038/nature14539",
+            "https://doi.org/10.1016/j.cell.2020.01.001.\nSmith J.": "10.1016/j.cell.2020.01.001",
+            "(doi 10.1000/xyz123). 2019": "10.1000/xyz123",
+            "10.1000/abc,2019": "10.1000/abc",
+            "参考 10.1000/abc。下一条": "10.1000/abc",
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(verify_references.extract_doi(text), expected)
+
+    def test_keeps_parentheses_inside_doi(self):
+        cases = {
+            "Lancet. doi:10.1016/S0140-6736(20)30183-5).": "10.1016/S0140-6736(20)30183-5",
+            "10.1002/(SICI)1097-4636(199706)35:4<483::AID-JBM8>3.0.CO;2-B.":
+                "10.1002/(SICI)1097-4636(199706)35:4<483::AID-JBM8>3.0.CO;2-B",
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(verify_references.extract_doi(text), expected)
+
+    def test_no_doi(self):
+        self.assertIsNone(verify_references.extract_doi("Vaswani A. Attention is all you need. 2017"))
+
+
+class SearchReferenceTest(unittest.TestCase):
+    """
+    按 DOI 查不到结果时退回 AI/规则提取的搜索词
+    """
+
+    REF = 'Vaswani A, et al. "Attention Is All You Need". NeurIPS 2017. doi:10.5555/3295222.3295349'
+    PAPER = {'paperId': 'W1', 'title': 'Attention is all you need'}
+
+    def test_doi_hit_skips_extraction(self):
+        with mock.patch.object(verify_references, 'search_openalex', return_value=[self.PAPER]) as search, \
+                mock.patch.object(verify_references, 'smart_extract_search_query') as extract:
+            result = verify_references.search_reference(self.REF, 'key', 'https://api.example.com')
+
+        self.assertEqual(result, ('10.5555/3295222.3295349', False, [self.PAPER]))
+        search.assert_called_once_with('10.5555/3295222.3295349', max_results=3)
+        extract.assert_not_called()
+
+    def test_empty_doi_search_falls_back_to_text_query(self):
+        def fake_search(query, max_results=3):
+            return [] if query.startswith('10.') else [self.PAPER]
+
+        with mock.patch.object(verify_references, 'search_openalex', side_effect=fake_search) as search, \
+                mock.patch.object(verify_references, 'extract_search_query_with_ai', return_value=None):
+            query, ai_used, papers = verify_references.search_reference(self.REF, None, 'https://api.example.com')
+
+        self.assertEqual(query, 'Attention Is All You Need')
+        self.assertFalse(ai_used)
+        self.assertEqual(papers, [self.PAPER])
+        self.assertEqual(
+            [call.args[0] for call in search.call_args_list],
+            ['10.5555/3295222.3295349', 'Attention Is All You Need'],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()